@@ -88,7 +88,12 @@ website_generators = ["Website Blog"]
 # before_install = "senaerp_platform.install.before_install"
 # after_install = "senaerp_platform.install.after_install"
 
-after_migrate = ["senaerp_platform.registry.seed.seed_registry"]
+after_migrate = [
+	"senaerp_platform.registry.seed.seed_registry",
+	"senaerp_platform.registry.catalog.enqueue_catalog_refresh",
+	"senaerp_platform.registry.model_migration.check_embedding_model",
+	"senaerp_platform.registry.warmup.enqueue_warmup",
+]
 
 # Uninstallation
 # ------------
@@ -163,6 +168,19 @@ after_migrate = ["senaerp_platform.registry.seed.seed_registry"]
 # 	],
 # }
 
+scheduler_events = {
+	"daily": [
+		"senaerp_platform.registry.model_migration.check_embedding_model",
+		"senaerp_platform.registry.search_stats.prune_search_stats",
+	],
+	"cron": {
+		"*/5 * * * *": [
+			"senaerp_platform.registry.installs.flush_install_counts",
+			"senaerp_platform.registry.search_stats.flush_search_events",
+		],
+	},
+}
+
 # Testing
 # -------
 
@@ -0,0 +1,8 @@
+import frappe
+
+from senaerp_platform.registry.content_hash import update_content_hash
+
+
+def execute():
+	for name in frappe.get_all("Registry", filters={"content_hash": ("is", "not set")}, pluck="name"):
+		update_content_hash(name)
@@ -0,0 +1,19 @@
+import frappe
+
+from senaerp_platform.registry.vector_index import encode_int8
+
+
+def execute():
+	"""Derive the compact int8 embedding column from the stored float embeddings."""
+	for name, embedding in frappe.get_all(
+		"Registry",
+		filters={"_embedding": ("is", "set"), "_embedding_int8": ("is", "not set")},
+		fields=["name", "_embedding"],
+		as_list=True,
+	):
+		try:
+			value = encode_int8(frappe.parse_json(embedding))
+		except (ValueError, TypeError):
+			continue
+		if value:
+			frappe.db.set_value("Registry", name, "_embedding_int8", value, update_modified=False)
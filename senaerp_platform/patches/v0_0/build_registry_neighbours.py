@@ -0,0 +1,6 @@
+from senaerp_platform.registry.neighbours import enqueue_rebuild
+
+
+def execute():
+	# Scoring every pair takes minutes on large registries; keep it out of migrate
+	enqueue_rebuild()
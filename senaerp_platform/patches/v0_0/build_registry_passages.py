@@ -0,0 +1,5 @@
+import frappe
+
+
+def execute():
+	frappe.enqueue("senaerp_platform.registry.passages.refresh_all_passages", queue="long", timeout=6 * 3600)
@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+	"""Flag the existing change feed entries of approved, public items as published."""
+	frappe.db.sql(
+		"""UPDATE `tabRegistry Change` c
+		JOIN `tabRegistry` r ON r.slug = c.slug
+		SET c.published = 1
+		WHERE r.trust_status = 'approved' AND r.visibility = 'public'"""
+	)
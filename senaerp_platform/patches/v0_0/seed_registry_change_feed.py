@@ -0,0 +1,11 @@
+import frappe
+
+from senaerp_platform.registry.changes import queue_changes
+
+
+def execute():
+	"""Start the change feed with an insert entry for every existing registry item."""
+	if frappe.db.count("Registry Change"):
+		return
+	queue_changes(frappe.get_all("Registry", pluck="name"))
+	frappe.db.commit()
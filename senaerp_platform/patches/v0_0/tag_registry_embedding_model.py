@@ -0,0 +1,14 @@
+import frappe
+
+from senaerp_platform.registry.embedding import _ACTIVE_MODEL_KEY, configured_model
+
+
+def execute():
+	"""Record the current model as the one behind all existing vectors."""
+	model = frappe.db.get_global(_ACTIVE_MODEL_KEY) or configured_model()
+	frappe.db.sql(
+		"""UPDATE `tabRegistry` SET `_embedding_model` = %(model)s
+		WHERE `_embedding` IS NOT NULL AND `_embedding` != '' AND IFNULL(`_embedding_model`, '') = ''""",
+		{"model": model},
+	)
+	frappe.db.set_global(_ACTIVE_MODEL_KEY, model)
@@ -1,9 +1,19 @@
+import hashlib
+import json
+import time
+
 import frappe
+from frappe.model import no_value_fields
+from frappe.utils import add_to_date, cint, now_datetime
+from werkzeug.wrappers import Response
 
+from senaerp_platform.registry.content_hash import get_content_hashes, package_hash
 from senaerp_platform.registry.embedding import (
 	fulltext_search,
 	semantic_search,
 )
+from senaerp_platform.registry.neighbours import NEIGHBOUR_COUNT
+from senaerp_platform.registry.search_stats import record_search
 
 
 SEARCH_FIELDS = [
@@ -19,11 +29,18 @@ SEARCH_FIELDS = [
 	"install_count",
 ]
 
+# Search responses are cached briefly; the key also changes with every registry change
+_SEARCH_CACHE_TTL = 300
+
+# site -> (registry version, {registry name: [tags]})
+_tag_maps: dict[str, tuple[int, dict[str, list[str]]]] = {}
+
 _ORDER_FIELDS = {
 	"featured": "featured DESC, modified DESC",
 	"newest": "creation DESC",
 	"updated": "modified DESC",
 	"popular": "install_count DESC",
+	"trending": "trending_score DESC, install_count DESC",
 	"alpha": "title ASC",
 }
 
@@ -88,7 +105,9 @@ def search(
 	sort_by="featured",
 	limit=20,
 	offset=0,
+	explain=False,
 ):
+	start = time.monotonic()
 	limit = min(int(limit), 100)
 	offset = int(offset)
 	featured_only = frappe.utils.sbool(featured_only)
@@ -105,6 +124,43 @@ def search(
 
 	order_fields = _ORDER_FIELDS.get(sort_by, _ORDER_FIELDS["featured"])
 
+	if frappe.utils.sbool(explain):
+		# Uncached, unrecorded run with scores, stage timings and query plans
+		from senaerp_platform.registry.explain import explain_search
+
+		frappe.only_for("System Manager")
+		return explain_search(q, tags, filters, order_fields, limit, offset)
+
+	cache_key = _search_cache_key(q, tags, filters, order_fields, limit, offset)
+	cached = frappe.cache.get_value(cache_key)
+	if cached:
+		items, total, path = cached
+	else:
+		items, total, path = _search(q, tags, filters, order_fields, limit, offset)
+		items = _attach_tags(items)
+		frappe.cache.set_value(cache_key, (items, total, path), expires_in_sec=_SEARCH_CACHE_TTL)
+
+	if not frappe.flags.registry_search_warmup:
+		record_search(
+			q, {**filters, "tags": tags, "sort_by": sort_by, "limit": limit}, path,
+			(time.monotonic() - start) * 1000, total,
+		)
+	return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+
+def _search_cache_key(*params) -> str:
+	"""Result cache key; changes with the registry version and the vector index version."""
+	from senaerp_platform.registry.changes import get_registry_version
+	from senaerp_platform.registry.vector_index import get_index_version
+
+	digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+	return f"registry_search:{get_registry_version()}:{get_index_version()}:{digest}"
+
+
+def _search(q, tags, filters, order_fields, limit, offset):
+	"""Run a search; returns (items, total, path) where path names the strategy that answered."""
+	from senaerp_platform.registry.explain import note_fallback, search_stage
+
 	if q:
 		# Try semantic search first (embedding cosine similarity)
 		semantic_results = semantic_search(q, filters=filters, limit=limit)
@@ -113,28 +169,37 @@ def search(
 			total = len(items)
 			# Apply tag filter post-search if needed
 			if tags:
-				items = _filter_by_tags(items, tags)
+				with search_stage("tag_filter"):
+					items = _filter_by_tags(items, tags)
 				total = len(items)
-			items = _attach_tags(items)
-			return {"items": items, "total": total, "limit": limit, "offset": offset}
+			return items, total, "semantic"
 
 		# Fall back to FULLTEXT MATCH AGAINST
 		try:
 			sql_order = ", ".join(f"r.{p.strip()}" for p in order_fields.split(","))
-			items, total = fulltext_search(q, filters=filters, order_by=sql_order, limit=limit, offset=offset)
+			with search_stage("fulltext"):
+				items, total = fulltext_search(
+					q, filters=filters, order_by=sql_order, limit=limit, offset=offset
+				)
 			if tags:
-				items = _filter_by_tags(items, tags)
+				with search_stage("tag_filter"):
+					items = _filter_by_tags(items, tags)
 				total = len(items)
-			items = _attach_tags(items)
-			return {"items": items, "total": total, "limit": limit, "offset": offset}
-		except Exception:
-			pass
+			return items, total, "fulltext"
+		except Exception as e:
+			note_fallback("fulltext", str(e))
 
 		# Final fallback: LIKE search
-		items, total = _like_search(q, tags, filters, order_fields, limit, offset)
-	elif tags:
-		items, total = _like_search(None, tags, filters, order_fields, limit, offset)
-	else:
+		with search_stage("like"):
+			items, total = _like_search(q, tags, filters, order_fields, limit, offset)
+		return items, total, "like"
+
+	if tags:
+		with search_stage("like"):
+			items, total = _like_search(None, tags, filters, order_fields, limit, offset)
+		return items, total, "tags"
+
+	with search_stage("browse"):
 		items = frappe.get_list(
 			"Registry",
 			filters=filters,
@@ -144,21 +209,14 @@ def search(
 			start=offset,
 		)
 		total = frappe.db.count("Registry", filters=filters)
-
-	items = _attach_tags(items)
-	return {"items": items, "total": total, "limit": limit, "offset": offset}
+	return items, total, "browse"
 
 
 def _attach_tags(items):
+	tag_map = get_tag_map()
 	for item in items:
 		if "name" in item:
-			item["tags"] = [
-				t.tag
-				for t in frappe.get_all(
-					"Registry Tag", filters={"parent": item["name"]}, fields=["tag"]
-				)
-			]
-			del item["name"]
+			item["tags"] = list(tag_map.get(item.pop("name"), []))
 		elif "tags" not in item:
 			item["tags"] = []
 	return items
@@ -168,20 +226,36 @@ def _filter_by_tags(items, tags_str):
 	tag_list = [t.strip().lower() for t in tags_str.split(",") if t.strip()]
 	if not tag_list:
 		return items
+	tag_map = get_tag_map()
 	filtered = []
 	for item in items:
 		item_name = item.get("name")
 		if not item_name:
 			continue
-		item_tags = {
-			t.tag.lower()
-			for t in frappe.get_all("Registry Tag", filters={"parent": item_name}, fields=["tag"])
-		}
+		item_tags = {t.lower() for t in tag_map.get(item_name, [])}
 		if all(t in item_tags for t in tag_list):
 			filtered.append(item)
 	return filtered
 
 
+def get_tag_map() -> dict[str, list[str]]:
+	"""Tags of every registry item, kept per worker until the registry version changes."""
+	from senaerp_platform.registry.changes import get_registry_version
+
+	version = get_registry_version()
+	cached = _tag_maps.get(frappe.local.site)
+	if cached and cached[0] == version:
+		return cached[1]
+
+	tag_map: dict[str, list[str]] = {}
+	for parent, tag in frappe.get_all(
+		"Registry Tag", fields=["parent", "tag"], order_by="idx asc", as_list=True, limit_page_length=0
+	):
+		tag_map.setdefault(parent, []).append(tag)
+	_tag_maps[frappe.local.site] = (version, tag_map)
+	return tag_map
+
+
 def _like_search(q, tags, filters, order_by, limit, offset):
 	"""LIKE-based text search (last resort fallback)."""
 	conditions = []
@@ -233,101 +307,285 @@ def _like_search(q, tags, filters, order_by, limit, offset):
 	return items, total
 
 
+ITEM_FIELDS = [
+	"slug", "title", "item_type", "category", "description", "trust_status",
+	"featured", "visibility", "install_count", "author", "version", "source_url",
+	"readme", "dotmatrix_avatar",
+]
+
+# Optional sections of a get_item / get_items response
+ITEM_SECTIONS = ("tags", "extension", "children", "parents")
+
+# Upper bound on slugs per get_items call
+_MAX_BATCH_ITEMS = 300
+
+
 @frappe.whitelist(allow_guest=True)
-def get_item(slug=None):
+def get_item(slug=None, fields=None, ext_fields=None, include=None):
+	"""Return a registry item with its tags, extension and parents.
+
+	``fields`` limits the registry fields, ``ext_fields`` the extension fields
+	and ``include`` the sections (see ITEM_SECTIONS) that are loaded; all three
+	default to everything. Each accepts a JSON list or comma-separated string.
+	"""
 	if not slug:
 		frappe.throw("slug is required", frappe.MandatoryError)
 
-	reg = frappe.db.get_value(
-		"Registry",
-		{"slug": slug},
-		["name", "slug", "title", "item_type", "category", "description",
-		 "trust_status", "featured", "visibility", "ref_name", "install_count",
-		 "author", "version", "source_url", "readme", "dotmatrix_avatar"],
-		as_dict=True,
-	)
-
-	if not reg:
+	result = _load_items([slug], fields, ext_fields, include).get(slug)
+	if not result:
 		frappe.throw(f"Registry item with slug '{slug}' not found", frappe.DoesNotExistError)
+	return result
 
-	reg["tags"] = [
-		t.tag
-		for t in frappe.get_all(
-			"Registry Tag", filters={"parent": reg["name"]}, fields=["tag"]
-		)
-	]
 
-	extension = None
-	if reg.get("ref_name"):
-		ext_doctype = EXTENSION_MAP.get(reg["item_type"])
-		if ext_doctype:
-			extension = _get_extension(ext_doctype, reg["ref_name"])
+@frappe.whitelist(allow_guest=True)
+def get_items(slugs=None, fields=None, ext_fields=None, include=None):
+	"""Fetch many registry items at once.
 
-	parents = _get_parents(reg["item_type"], reg["ref_name"]) if reg.get("ref_name") else []
+	Accepts a JSON list or comma-separated string of slugs and returns the
+	same per-item shape as ``get_item``, in request order. Tags, extensions,
+	link references and parents are loaded for the whole batch at once, so the
+	number of queries does not grow with the number of slugs.
+	"""
+	slugs = _parse_list(slugs)
+	if not slugs:
+		frappe.throw("slugs is required", frappe.MandatoryError)
+	if len(slugs) > _MAX_BATCH_ITEMS:
+		frappe.throw(f"At most {_MAX_BATCH_ITEMS} slugs can be fetched at once")
+
+	slugs = list(dict.fromkeys(slugs))
+	loaded = _load_items(slugs, fields, ext_fields, include)
+	return {
+		"items": [loaded[s] for s in slugs if s in loaded],
+		"missing": [s for s in slugs if s not in loaded],
+	}
 
-	del reg["name"]
-	del reg["ref_name"]
 
-	result = {"registry": reg, "extension": extension}
-	if parents:
-		result["parents"] = parents
-	return result
+def _parse_list(value) -> list[str]:
+	"""Accept a list, a JSON list string or a comma-separated string."""
+	if not value:
+		return []
+	if isinstance(value, str):
+		value = value.strip()
+		value = frappe.parse_json(value) if value.startswith("[") else value.split(",")
+	return [str(v).strip() for v in value if v and str(v).strip()]
 
 
-def _get_extension(ext_doctype, ext_name):
-	ext = frappe.get_doc(ext_doctype, ext_name)
-	data = ext.as_dict()
+# ---------------------------------------------------------------------------
+# Batch loading
+# ---------------------------------------------------------------------------
 
-	for key in ["doctype", "name", "owner", "creation", "modified", "modified_by",
-				"docstatus", "idx", "registry"]:
-		data.pop(key, None)
+_META_FIELDS = ("doctype", "name", "owner", "creation", "modified", "modified_by",
+				"docstatus", "idx", "registry")
 
-	# Resolve direct link fields to Registry items
-	for field, target_dt in _EXT_LINK_FIELDS.get(ext_doctype, {}).items():
-		if data.get(field):
-			ref = _resolve_to_registry(target_dt, data[field])
-			if ref:
-				data[f"{field}_ref"] = ref
 
-	# Clean and resolve child table rows
-	child_fields = EXTENSION_CHILDREN.get(ext_doctype, [])
-	for field in child_fields:
-		if field in data and isinstance(data[field], list):
-			child_dt = _CHILD_TABLE_DOCTYPES.get(field)
-			data[field] = [_clean_child_row(row, child_dt) for row in data[field]]
+def _load_items(slugs: list[str], fields=None, ext_fields=None, include=None) -> dict[str, dict]:
+	"""Load registry items with tags, extensions and parents, keyed by slug.
 
-	return data
+	Sections and fields that were not requested are never queried.
+	"""
+	fields = _parse_list(fields) or ITEM_FIELDS
+	unknown = set(fields) - set(ITEM_FIELDS)
+	if unknown:
+		frappe.throw(f"Unknown registry fields: {', '.join(sorted(unknown))}")
+
+	include = set(_parse_list(include) or ITEM_SECTIONS)
+	unknown = include - set(ITEM_SECTIONS)
+	if unknown:
+		frappe.throw(f"Unknown sections: {', '.join(sorted(unknown))}")
+
+	ext_fields = _parse_list(ext_fields) or None
+	if ext_fields:
+		unknown = set(ext_fields) - _extension_fields()
+		if unknown:
+			frappe.throw(f"Unknown extension fields: {', '.join(sorted(unknown))}")
+
+	load_extension = "extension" in include
+	needs_ref = load_extension or "parents" in include
+
+	query_fields = ["name", "slug", "item_type"]
+	if needs_ref:
+		query_fields.append("ref_name")
+	query_fields += [f for f in fields if f not in query_fields]
+
+	regs = frappe.get_all(
+		"Registry",
+		filters={"slug": ("in", slugs)},
+		fields=query_fields,
+	)
+	if not regs:
+		return {}
+
+	tags = _load_tags([r.name for r in regs]) if "tags" in include else None
+
+	ext_refs: dict[str, list[str]] = {}
+	if needs_ref:
+		for reg in regs:
+			ext_doctype = EXTENSION_MAP.get(reg.item_type)
+			if ext_doctype and reg.ref_name:
+				ext_refs.setdefault(ext_doctype, []).append(reg.ref_name)
+
+	extensions: dict[tuple[str, str], dict] = {}
+	if load_extension:
+		for ext_doctype, names in ext_refs.items():
+			loaded = _load_extensions(
+				ext_doctype, names,
+				fields=ext_fields,
+				children="children" in include,
+			)
+			for name, data in loaded.items():
+				extensions[(ext_doctype, name)] = data
+		_attach_refs(extensions)
+
+	parents = _load_parents(ext_refs) if "parents" in include else {}
+
+	results = {}
+	for reg in regs:
+		key = (EXTENSION_MAP.get(reg.item_type), reg.get("ref_name"))
+		slug = reg.slug
+		registry = {f: reg.get(f) for f in fields}
+		if tags is not None:
+			registry["tags"] = tags.get(reg.name, [])
+
+		result = {"registry": registry}
+		if load_extension:
+			result["extension"] = extensions.get(key)
+		if parents.get(key):
+			result["parents"] = parents[key]
+		results[slug] = result
+	return results
+
+
+def _load_tags(registry_names: list[str]) -> dict[str, list[str]]:
+	tags: dict[str, list[str]] = {}
+	if not registry_names:
+		return tags
+	for t in frappe.get_all(
+		"Registry Tag",
+		filters={"parent": ("in", registry_names)},
+		fields=["parent", "tag"],
+		order_by="idx asc",
+	):
+		tags.setdefault(t.parent, []).append(t.tag)
+	return tags
+
+
+def _data_fields(doctype: str) -> list[str]:
+	"""Fieldnames of a DocType that hold values (no breaks or tables)."""
+	return [
+		df.fieldname
+		for df in frappe.get_meta(doctype).fields
+		if df.fieldtype not in no_value_fields
+	]
 
 
-def _clean_child_row(row, child_doctype=None):
-	if not isinstance(row, dict):
-		row = row.as_dict()
-	else:
-		row = dict(row)
-	for key in ["doctype", "name", "owner", "creation", "modified", "modified_by",
-				"docstatus", "parent", "parentfield", "parenttype", "idx"]:
-		row.pop(key, None)
-
-	# Resolve link fields to Registry items
-	if child_doctype:
-		for field, target_dt in _CHILD_LINK_FIELDS.get(child_doctype, {}).items():
-			if row.get(field):
-				ref = _resolve_to_registry(target_dt, row[field])
-				if ref:
-					row[f"{field}_ref"] = ref
-
-	return row
-
-
-def _resolve_to_registry(ext_doctype, ext_name):
-	"""Resolve an extension DocType name back to its parent Registry item."""
-	registry_name = frappe.db.get_value(ext_doctype, ext_name, "registry")
-	if not registry_name:
-		return None
-	return frappe.db.get_value(
-		"Registry", registry_name,
-		["slug", "title", "item_type"], as_dict=True,
+def _extension_fields() -> set[str]:
+	"""Every field and child table any extension DocType has."""
+	fields = set()
+	for ext_doctype in set(EXTENSION_MAP.values()):
+		fields.update(_data_fields(ext_doctype))
+		fields.update(EXTENSION_CHILDREN.get(ext_doctype, []))
+	return fields
+
+
+def _load_extensions(ext_doctype: str, ext_names: list[str], fields=None, children=True) -> dict[str, dict]:
+	"""Load extension rows and their child tables, keyed by extension name.
+
+	``fields`` restricts the extension columns (fields this DocType does not
+	have are ignored, as callers validate against all extension DocTypes);
+	``children=False`` skips the child table queries.
+	"""
+	if not ext_names:
+		return {}
+	data_fields = _data_fields(ext_doctype)
+	if fields:
+		data_fields = [f for f in data_fields if f in fields]
+
+	rows = frappe.get_all(
+		ext_doctype,
+		filters={"name": ("in", ext_names)},
+		fields=["name", *data_fields],
 	)
+	data = {}
+	for row in rows:
+		name = row.name
+		for key in _META_FIELDS:
+			row.pop(key, None)
+		data[name] = row
+
+	if not children or not data:
+		return data
+
+	for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+		if fields and child_field not in fields:
+			continue
+		child_dt = _CHILD_TABLE_DOCTYPES[child_field]
+		for row in data.values():
+			row[child_field] = []
+		for child in frappe.get_all(
+			child_dt,
+			filters={"parent": ("in", list(data)), "parentfield": child_field},
+			fields=["parent", *_data_fields(child_dt)],
+			order_by="idx asc",
+		):
+			data[child.pop("parent")][child_field].append(child)
+
+	return data
+
+
+def _iter_links(ext_doctype: str, data: dict):
+	"""Yield (row, field, target_doctype) for every set link in extension data."""
+	for field, target_dt in _EXT_LINK_FIELDS.get(ext_doctype, {}).items():
+		if data.get(field):
+			yield data, field, target_dt
+	for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+		child_dt = _CHILD_TABLE_DOCTYPES.get(child_field)
+		for row in data.get(child_field) or []:
+			for field, target_dt in _CHILD_LINK_FIELDS.get(child_dt, {}).items():
+				if row.get(field):
+					yield row, field, target_dt
+
+
+def _attach_refs(extensions: dict[tuple[str, str], dict]) -> None:
+	"""Add ``<field>_ref`` Registry summaries next to every link field."""
+	links = [
+		link
+		for (ext_doctype, _), data in extensions.items()
+		for link in _iter_links(ext_doctype, data)
+	]
+	resolved = _resolve_refs({(target_dt, row[field]) for row, field, target_dt in links})
+	for row, field, target_dt in links:
+		ref = resolved.get((target_dt, row[field]))
+		if ref:
+			row[f"{field}_ref"] = ref
+
+
+def _resolve_refs(refs) -> dict[tuple[str, str], dict]:
+	"""Resolve (extension_doctype, extension_name) pairs to Registry summaries."""
+	by_doctype: dict[str, set[str]] = {}
+	for ext_doctype, ext_name in refs:
+		by_doctype.setdefault(ext_doctype, set()).add(ext_name)
+
+	registry_of = {}
+	for ext_doctype, names in by_doctype.items():
+		for row in frappe.get_all(
+			ext_doctype,
+			filters={"name": ("in", list(names))},
+			fields=["name", "registry"],
+		):
+			if row.registry:
+				registry_of[(ext_doctype, row.name)] = row.registry
+	if not registry_of:
+		return {}
+
+	regs = {
+		r.pop("name"): r
+		for r in frappe.get_all(
+			"Registry",
+			filters={"name": ("in", list(set(registry_of.values())))},
+			fields=["name", "slug", "title", "item_type"],
+		)
+	}
+	return {key: regs[reg] for key, reg in registry_of.items() if reg in regs}
 
 
 # ---------------------------------------------------------------------------
@@ -351,54 +609,357 @@ _DIRECT_PARENT_MAP = {
 }
 
 
-def _get_parents(item_type, ref_name):
-	"""Find direct parents that reference this item."""
-	if not ref_name:
-		return []
+def _load_parents(ext_refs: dict[str, list[str]]) -> dict[tuple[str, str], list[dict]]:
+	"""Find direct parents for a batch of extensions.
 
-	ext_doctype = EXTENSION_MAP.get(item_type)
-	if not ext_doctype:
-		return []
-
-	parents = []
+	``ext_refs`` maps extension DocType -> extension names. Returns
+	{(extension_doctype, extension_name): [Registry summaries]}.
+	"""
+	edges = []
+	for ext_doctype, names in ext_refs.items():
+		# Reverse child-table lookups
+		for child_dt, link_field, parent_ext_dt in _CHILD_PARENT_MAP.get(ext_doctype, []):
+			for row in frappe.get_all(
+				child_dt,
+				filters={link_field: ("in", names)},
+				fields=["parent", link_field],
+			):
+				edges.append(((ext_doctype, row[link_field]), (parent_ext_dt, row.parent)))
+
+		# Reverse direct-field lookups
+		for field, parent_ext_dt in _DIRECT_PARENT_MAP.get(ext_doctype, []):
+			for row in frappe.get_all(
+				parent_ext_dt,
+				filters={field: ("in", names)},
+				fields=["name", field],
+			):
+				edges.append(((ext_doctype, row[field]), (parent_ext_dt, row.name)))
+
+	resolved = _resolve_refs({parent for _, parent in edges})
+
+	parents: dict[tuple[str, str], list[dict]] = {}
 	seen = set()
+	for child, parent in edges:
+		ref = resolved.get(parent)
+		if ref and (child, ref.slug) not in seen:
+			seen.add((child, ref.slug))
+			parents.setdefault(child, []).append(ref)
+	return parents
 
-	# Reverse child-table lookups
-	for child_dt, link_field, parent_ext_dt in _CHILD_PARENT_MAP.get(ext_doctype, []):
-		rows = frappe.get_all(
-			child_dt,
-			filters={link_field: ref_name},
-			fields=["parent"],
-		)
-		for row in rows:
-			reg_name = frappe.db.get_value(parent_ext_dt, row.parent, "registry")
-			if reg_name and reg_name not in seen:
-				seen.add(reg_name)
-				ref = frappe.db.get_value(
-					"Registry", reg_name,
-					["slug", "title", "item_type"], as_dict=True,
-				)
-				if ref:
-					parents.append(ref)
-
-	# Reverse direct-field lookups
-	for field, parent_ext_dt in _DIRECT_PARENT_MAP.get(ext_doctype, []):
-		rows = frappe.get_all(
-			parent_ext_dt,
-			filters={field: ref_name},
-			fields=["registry"],
-		)
-		for row in rows:
-			if row.registry and row.registry not in seen:
-				seen.add(row.registry)
-				ref = frappe.db.get_value(
-					"Registry", row.registry,
-					["slug", "title", "item_type"], as_dict=True,
-				)
-				if ref:
-					parents.append(ref)
 
-	return parents
+# ---------------------------------------------------------------------------
+# Tree
+# ---------------------------------------------------------------------------
+
+_TREE_CACHE_KEY = "registry_tree"
+_DEFAULT_TREE_DEPTH = 4  # cluster -> team -> agent -> tools/skills/UI/logic
+_MAX_TREE_DEPTH = 6
+
+# Child rows with several links become one node, for this link; the other
+# links are reported as slugs on that node (e.g. a team member's role).
+_TREE_PRIMARY_LINK = {"Registry Team Member": "agent"}
+
+
+@frappe.whitelist(allow_guest=True)
+def get_tree(slug=None, depth=_DEFAULT_TREE_DEPTH):
+	"""Return the nested dependency tree below an item, ``depth`` levels deep.
+
+	Each node is ``{slug, title, item_type, field, children}`` where ``field``
+	is the link (or child table link) it hangs from, plus the plain values of
+	its child table row (e.g. ``enabled``, ``activation``, ``role``). Nodes
+	at the depth limit carry no ``children`` key. Built with a fixed number of
+	queries per level and cached until the registry version changes.
+	"""
+	if not slug:
+		frappe.throw("slug is required", frappe.MandatoryError)
+	depth = min(max(cint(depth), 0), _MAX_TREE_DEPTH)
+	return _cached_for_version(_TREE_CACHE_KEY, f"{slug}:{depth}", lambda: _build_tree(slug, depth))
+
+
+def _cached_for_version(cache_key: str, field: str, build):
+	"""Return ``build()``, cached in a Redis hash until the registry version changes."""
+	from senaerp_platform.registry.changes import get_registry_version
+
+	# Read the version first: a change committed mid-build leaves a stale
+	# entry under the old version, which the next call rebuilds
+	version = get_registry_version()
+	cached = frappe.cache.hget(cache_key, field)
+	if cached and cached["version"] == version:
+		return cached["value"]
+
+	value = build()
+	frappe.cache.hset(cache_key, field, {"version": version, "value": value})
+	return value
+
+
+def _build_tree(slug: str, depth: int) -> dict:
+	reg = frappe.db.get_value(
+		"Registry", {"slug": slug}, ["slug", "title", "item_type", "ref_name"], as_dict=True
+	)
+	if not reg:
+		frappe.throw(f"Registry item '{slug}' not found", frappe.DoesNotExistError)
+
+	root = {"slug": reg.slug, "title": reg.title, "item_type": reg.item_type}
+	level = [(root, EXTENSION_MAP.get(reg.item_type), reg.ref_name)]
+
+	# One pass per level: bulk-load the level's extensions (one query per
+	# DocType and child table), then resolve all their links at once
+	for _ in range(depth):
+		names_by_doctype: dict[str, set[str]] = {}
+		for _node, ext_doctype, ext_name in level:
+			if ext_doctype and ext_name:
+				names_by_doctype.setdefault(ext_doctype, set()).add(ext_name)
+		extensions = {
+			(ext_doctype, name): data
+			for ext_doctype, names in names_by_doctype.items()
+			for name, data in _load_extensions(ext_doctype, list(names)).items()
+		}
+
+		edges = []  # (parent node, link field, target doctype, target name, child row, child doctype)
+		refs = set()
+		for node, ext_doctype, ext_name in level:
+			node["children"] = []
+			data = extensions.get((ext_doctype, ext_name))
+			if not data:
+				continue
+			for field, target_dt in _EXT_LINK_FIELDS.get(ext_doctype, {}).items():
+				if data.get(field):
+					edges.append((node, field, target_dt, data[field], None, None))
+			for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+				child_dt = _CHILD_TABLE_DOCTYPES[child_field]
+				links = _CHILD_LINK_FIELDS.get(child_dt, {})
+				primary = _TREE_PRIMARY_LINK.get(child_dt) or next(iter(links), None)
+				for row in data.get(child_field) or []:
+					if row.get(primary):
+						edges.append((node, primary, links[primary], row[primary], row, child_dt))
+					refs.update((links[f], row[f]) for f in links if f != primary and row.get(f))
+
+		refs.update((target_dt, name) for _, _, target_dt, name, _, _ in edges)
+		resolved = _resolve_refs(refs)
+
+		level = []
+		for node, field, target_dt, name, row, child_dt in edges:
+			ref = resolved.get((target_dt, name))
+			if not ref:
+				continue
+			child = {**ref, "field": field}
+			if row is not None:
+				child.update(_row_values(row, child_dt, field, resolved))
+			node["children"].append(child)
+			level.append((child, target_dt, name))
+		if not level:
+			break
+
+	return root
+
+
+def _row_values(row: dict, child_dt: str, link_field: str, resolved: dict) -> dict:
+	"""Plain values of a child table row, with its other link fields as slugs."""
+	links = _CHILD_LINK_FIELDS.get(child_dt, {})
+	values = {}
+	for key, value in row.items():
+		if key == link_field:
+			continue
+		if key in links:
+			ref = resolved.get((links[key], value))
+			value = ref["slug"] if ref else value
+		values[key] = value
+	return values
+
+
+# ---------------------------------------------------------------------------
+# Agent manifest
+# ---------------------------------------------------------------------------
+
+_MANIFEST_CACHE_KEY = "registry_agent_manifest"
+
+# Agent fields copied into the manifest as-is
+_AGENT_CONFIG_FIELDS = [
+	"is_system", "model", "selectable_models", "failover_chain",
+	"temperature", "max_turns", "thinking_mode", "thinking_budget",
+]
+
+
+@frappe.whitelist(allow_guest=True)
+def get_agent_manifest(slug=None):
+	"""Return the resolved configuration of an agent in one payload.
+
+	Merges the agent with its ``agent_role`` template (properties, triggers
+	and which parts tenants may override), inlines its enabled tools and
+	skills and its UI and logic by slug, and lists the teams it belongs to
+	with the role config their ``team_type`` sets for it. Cached per agent
+	until the registry version changes.
+	"""
+	if not slug:
+		frappe.throw("slug is required", frappe.MandatoryError)
+	return _cached_for_version(_MANIFEST_CACHE_KEY, slug, lambda: _build_agent_manifest(slug))
+
+
+def _build_agent_manifest(slug: str) -> dict:
+	from senaerp_platform.registry.seed import OVERRIDABLE_FIELDS, PROPERTY_FIELDS, TRIGGER_FIELDS
+
+	reg = frappe.db.get_value(
+		"Registry", {"slug": slug}, ["slug", "title", "item_type", "ref_name"], as_dict=True
+	)
+	if not reg or reg.item_type != "Agent" or not reg.ref_name:
+		frappe.throw(f"Agent '{slug}' not found", frappe.DoesNotExistError)
+
+	agent = _load_extensions("Registry Agent", [reg.ref_name]).get(reg.ref_name)
+	if not agent:
+		frappe.throw(f"Agent '{slug}' has no configuration", frappe.DoesNotExistError)
+
+	tools = [row for row in agent.agent_tools if cint(row.enabled)]
+	skills = [row for row in agent.agent_skills if cint(row.enabled)]
+	memberships = frappe.get_all(
+		"Registry Team Member",
+		filters={"agent": reg.ref_name, "parenttype": "Registry Team"},
+		fields=["parent", "role"],
+	)
+	teams = _load_extensions("Registry Team", list({m.parent for m in memberships}), children=False)
+	team_types = _load_extensions(
+		"Registry Team Template", list({t.team_type for t in teams.values() if t.team_type})
+	)
+
+	# Every linked document, inlined below with one query per DocType
+	linked = {
+		"Registry Agent Template": {agent.agent_role} | {m.role for m in memberships},
+		"Registry Tool": {row.tool for row in tools},
+		"Registry Skill": {row.skill for row in skills},
+		"Registry UI": {agent.ui},
+		"Registry Logic": {agent.logic},
+	}
+	data = {
+		ext_doctype: _load_extensions(ext_doctype, [n for n in names if n], children=False)
+		for ext_doctype, names in linked.items()
+	}
+	refs = {(ext_doctype, name) for ext_doctype, names in data.items() for name in names}
+	refs.update(("Registry Team", name) for name in teams)
+	refs.update(("Registry Team Template", name) for name in team_types)
+	resolved = _resolve_refs(refs)
+
+	def inline(ext_doctype, name, **extra):
+		ref = resolved.get((ext_doctype, name))
+		if not ref:
+			return None
+		return {**ref, **extra, **data[ext_doctype][name]}
+
+	def slug_of(ext_doctype, name):
+		ref = resolved.get((ext_doctype, name))
+		return ref["slug"] if ref else None
+
+	template = data["Registry Agent Template"].get(agent.agent_role) or {}
+	manifest = {
+		"slug": reg.slug,
+		"title": reg.title,
+		**{f: agent.get(f) for f in _AGENT_CONFIG_FIELDS},
+		"agent_role": slug_of("Registry Agent Template", agent.agent_role),
+		"properties": {f: cint(template.get(f)) for f in PROPERTY_FIELDS},
+		"triggers": {f: cint(template.get(f)) for f in TRIGGER_FIELDS},
+		"overridable": {f.removesuffix("_overridable"): cint(template.get(f)) for f in OVERRIDABLE_FIELDS},
+		"tools": [
+			t for row in tools if (t := inline("Registry Tool", row.tool))
+		],
+		"skills": [
+			s for row in skills if (s := inline("Registry Skill", row.skill, activation=row.activation))
+		],
+		"ui": inline("Registry UI", agent.ui),
+		"logic": inline("Registry Logic", agent.logic),
+		"teams": [],
+	}
+
+	for member in memberships:
+		team = teams.get(member.parent)
+		team_slug = slug_of("Registry Team", member.parent)
+		if not team or not team_slug:
+			continue
+		# The team role, falling back to the agent's own role
+		role = member.role or agent.agent_role
+		team_type = team_types.get(team.team_type) or {}
+		config = next((c for c in team_type.get("role_configs", []) if c.role == role), None)
+		manifest["teams"].append({
+			"slug": team_slug,
+			"role": slug_of("Registry Agent Template", role),
+			"team_type": slug_of("Registry Team Template", team.team_type),
+			"team_type_overridable": cint(team_type.get("overridable")),
+			"min_agents": config.min_agents if config else None,
+			"max_agents": config.max_agents if config else None,
+		})
+	return manifest
+
+
+# ---------------------------------------------------------------------------
+# Similar items
+# ---------------------------------------------------------------------------
+
+
+@frappe.whitelist(allow_guest=True)
+def similar(slug=None, limit=10):
+	"""Return approved items most similar to ``slug``, from the precomputed neighbour lists."""
+	if not slug:
+		frappe.throw("slug is required", frappe.MandatoryError)
+	limit = min(max(cint(limit), 1), NEIGHBOUR_COUNT)
+
+	items = frappe.db.sql(
+		"""
+		SELECT r.slug, r.title, r.item_type, r.category, r.description,
+			r.trust_status, r.featured, r.author, r.install_count, n.score
+		FROM `tabRegistry` src
+		JOIN `tabRegistry Neighbour` n ON n.registry = src.name
+		JOIN `tabRegistry` r ON r.name = n.neighbour
+		WHERE src.slug = %(slug)s
+			AND r.trust_status = 'approved'
+			AND r.visibility = 'public'
+		ORDER BY n.position
+		LIMIT %(limit)s
+		""",
+		{"slug": slug, "limit": limit},
+		as_dict=True,
+	)
+	return {"items": items}
+
+
+# ---------------------------------------------------------------------------
+# Change feed
+# ---------------------------------------------------------------------------
+
+_MAX_CHANGES = 1000
+# Rows younger than this may still be followed by a lower seq from a slower
+# concurrent transaction, so they are held back until the next poll.
+_CHANGE_SETTLE_SECONDS = 5
+
+
+@frappe.whitelist(allow_guest=True)
+def changes(since=0, limit=500):
+	"""Page through the registry change feed.
+
+	Returns entries with ``seq > since`` in order, each ``{seq, slug, op,
+	item_type, content_hash}``. Tenants store ``next`` and pass it back as
+	``since`` until ``has_more`` is false.
+
+	Only approved, public items appear; one that is blocked or made private
+	shows up as a ``delete``. Entries track install-package content, so
+	counters written directly (``install_count``, ``trending_score``) do not
+	produce any.
+	"""
+	since = cint(since)
+	limit = min(max(cint(limit), 1), _MAX_CHANGES)
+
+	entries = frappe.get_all(
+		"Registry Change",
+		filters={
+			"name": (">", since),
+			"published": 1,
+			"creation": ("<", add_to_date(now_datetime(), seconds=-_CHANGE_SETTLE_SECONDS)),
+		},
+		fields=["name as seq", "slug", "op", "item_type", "content_hash"],
+		order_by="name asc",
+		limit_page_length=limit,
+	)
+	return {
+		"changes": entries,
+		"next": entries[-1].seq if entries else since,
+		"has_more": len(entries) == limit,
+	}
 
 
 # ---------------------------------------------------------------------------
@@ -411,13 +972,31 @@ INSTALL_ORDER = {
 }
 
 
+_PACKAGE_CACHE_KEY = "registry_install_package"
+
+
 @frappe.whitelist(allow_guest=True)
-def get_install_package(slug: str | None = None):
+def get_install_package(slug: str | None = None, format: str | None = None):
 	"""Return all dependencies for a registry item as a flat install-ordered list.
 
-	Each item includes full extension data. Link references between items
-	use slugs (not internal names like RA-00005).
+	Each item includes full extension data and its content hash. Link references
+	between items use slugs (not internal names like RA-00005).
+
+	Responses carry a strong ETag (the package hash over every member's content
+	hash); a matching If-None-Match is answered with 304 Not Modified.
+
+	With ``format=ndjson`` the package is streamed as one JSON item per line in
+	install order, building each item only when it is written.
 	"""
+	if format == "ndjson":
+		return _stream_package(slug)
+
+	package = _get_package(slug)
+	return _etag_response({"items": package["items"]}, package["etag"])
+
+
+def _get_installable(slug: str | None) -> str:
+	"""Return the registry name for an approved item, or throw."""
 	if not slug:
 		frappe.throw("slug is required", frappe.MandatoryError)
 
@@ -430,18 +1009,174 @@ def get_install_package(slug: str | None = None):
 		frappe.throw(f"Registry item '{slug}' not found", frappe.DoesNotExistError)
 	if reg.trust_status != "approved":
 		frappe.throw(f"Registry item '{slug}' is not approved for installation")
+	return reg.name
+
 
+def _package_members(registry_name: str) -> list[dict]:
+	"""Return install-ordered [{name, slug, item_type, content_hash}] for a package."""
 	visited: dict[str, bool] = {}
-	_collect_deps(reg.name, visited)
+	_collect_deps(registry_name, visited)
+
+	rows = {
+		r.name: r
+		for r in frappe.get_all(
+			"Registry",
+			filters={"name": ("in", list(visited))},
+			fields=["name", "slug", "item_type", "content_hash"],
+		)
+	}
+	members = [rows[name] for name in visited if name in rows]
+	members.sort(key=lambda m: INSTALL_ORDER.get(m.item_type, 99))
+	return members
+
+
+def _get_package(slug: str | None) -> dict:
+	"""Return {"etag", "members", "items"} for an approved registry item.
+
+	Packages are cached by registry name. A cached package is reused as long
+	as the stored content hashes of all its members still produce its etag.
+	"""
+	reg_name = _get_installable(slug)
+
+	cached = _cached_package(reg_name)
+	if cached:
+		return cached
 
+	members = _package_members(reg_name)
 	items = []
-	for reg_name in visited:
-		item = _build_package_item(reg_name)
+	for member in members:
+		item = _build_package_item(member.name)
 		if item:
+			item["content_hash"] = member.content_hash
 			items.append(item)
 
-	items.sort(key=lambda x: INSTALL_ORDER.get(x["item_type"], 99))
-	return {"items": items}
+	package = {
+		"etag": package_hash({m.name: m.content_hash for m in members}),
+		"members": [m.name for m in members],
+		"items": items,
+	}
+	frappe.cache.hset(_PACKAGE_CACHE_KEY, reg_name, package)
+	return package
+
+
+def _cached_package(registry_name: str) -> dict | None:
+	"""Return the cached package if none of its members changed since it was built."""
+	cached = frappe.cache.hget(_PACKAGE_CACHE_KEY, registry_name)
+	if cached and package_hash(get_content_hashes(cached["members"])) == cached["etag"]:
+		return cached
+	return None
+
+
+@frappe.whitelist(allow_guest=True)
+def get_install_delta(slug: str | None = None, manifest: str | dict | None = None):
+	"""Return only the package items a tenant is missing or has outdated.
+
+	``manifest`` is the tenant's installed {slug: content_hash}. Items whose
+	hash differs (or that are absent) are returned in full and install order;
+	manifest slugs that are no longer part of the package are listed as
+	orphaned so the tenant can remove them.
+	"""
+	manifest = frappe.parse_json(manifest) if manifest else {}
+	if not isinstance(manifest, dict):
+		frappe.throw("manifest must be an object of {slug: content_hash}", frappe.ValidationError)
+
+	reg_name = _get_installable(slug)
+
+	cached = _cached_package(reg_name)
+	unchanged = 0
+	if cached:
+		package_slugs = {item["slug"] for item in cached["items"]}
+		items = []
+		for item in cached["items"]:
+			if _is_installed(manifest, item["slug"], item["content_hash"]):
+				unchanged += 1
+			else:
+				items.append(item)
+		etag = cached["etag"]
+	else:
+		members = _package_members(reg_name)
+		package_slugs = {m.slug for m in members}
+		items = []
+		for member in members:
+			if _is_installed(manifest, member.slug, member.content_hash):
+				unchanged += 1
+				continue
+			item = _build_package_item(member.name)
+			if item:
+				item["content_hash"] = member.content_hash
+				items.append(item)
+		etag = package_hash({m.name: m.content_hash for m in members})
+
+	return {
+		"etag": etag,
+		"items": items,
+		"unchanged": unchanged,
+		"orphaned": sorted(s for s in manifest if s not in package_slugs),
+	}
+
+
+def _is_installed(manifest: dict, slug: str, content_hash: str | None) -> bool:
+	"""Whether the tenant has this exact item. Items without a hash yet are always sent."""
+	return content_hash is not None and slug in manifest and manifest[slug] == content_hash
+
+
+def _stream_package(slug: str | None):
+	"""Stream a package as NDJSON, keeping at most one built item in memory."""
+	members = _package_members(_get_installable(slug))
+	etag = package_hash({m.name: m.content_hash for m in members})
+	headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+	if _etag_matches(etag):
+		return Response(status=304, headers=headers)
+
+	def lines():
+		for member in members:
+			item = _build_package_item(member.name)
+			if item:
+				item["content_hash"] = member.content_hash
+				yield frappe.as_json(item, indent=None, separators=(",", ":")) + "\n"
+
+	return _streaming_response(lines, mimetype="application/x-ndjson", headers=headers)
+
+
+def _streaming_response(generate, mimetype: str, headers: dict | None = None):
+	"""Wrap a generator function in a streaming response.
+
+	Frappe closes the request's DB connection and releases the site context
+	before the WSGI server iterates the body, so the generator sets up its own.
+	"""
+	site = frappe.local.site
+
+	def body():
+		frappe.init(site=site)
+		frappe.connect(set_admin_as_user=False)
+		try:
+			yield from generate()
+		finally:
+			frappe.destroy()
+
+	return Response(body(), mimetype=mimetype, headers=headers, direct_passthrough=True)
+
+
+def _etag_response(data, etag: str):
+	"""Build a JSON response tagged with a strong ETag, or 304 if the client has it."""
+	headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+	if _etag_matches(etag):
+		return Response(status=304, headers=headers)
+	return Response(
+		frappe.as_json({"message": data}, indent=None, separators=(",", ":")),
+		content_type="application/json",
+		headers=headers,
+	)
+
+
+def _etag_matches(etag: str) -> bool:
+	header = frappe.get_request_header("If-None-Match")
+	if not header:
+		return False
+	if header.strip() == "*":
+		return True
+	candidates = {c.strip().removeprefix("W/").strip('"') for c in header.split(",")}
+	return etag in candidates
 
 
 def _collect_deps(registry_name: str, visited: dict[str, bool]) -> None:
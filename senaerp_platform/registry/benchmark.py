@@ -0,0 +1,105 @@
+"""Benchmark: float vector index vs int8 index with exact float re-ranking.
+
+Runs against the site's stored embeddings, or against synthetic clustered
+vectors when ``synthetic`` gives an item count::
+
+	bench --site <site> execute senaerp_platform.registry.benchmark.run_vector_benchmark
+	bench --site <site> execute senaerp_platform.registry.benchmark.run_vector_benchmark --kwargs "{'synthetic': 5000}"
+
+Reports vector memory, recall@k against the exact float ranking (int8 scan
+alone and int8 + re-ranking) and mean per-query latency. Re-ranking here
+reads float vectors from memory; in ``semantic_search`` it is one extra
+query for ``k * candidates`` rows.
+"""
+
+from __future__ import annotations
+
+import operator
+import random
+import time
+
+import frappe
+
+from senaerp_platform.registry.vector_index import VectorIndex, dot, encode_int8, normalize
+
+
+def run_vector_benchmark(synthetic=0, queries=50, k=10, candidates=4, dim=1536, seed=42) -> dict:
+	rng = random.Random(seed)
+	if synthetic:
+		embeddings = _synthetic_embeddings(int(synthetic), int(dim), rng)
+	else:
+		embeddings = [
+			frappe.parse_json(value)
+			for value in frappe.get_all("Registry", filters={"_embedding": ("is", "set")}, pluck="_embedding")
+		]
+	if len(embeddings) <= k:
+		frappe.throw(f"Need more than {k} embeddings to benchmark, found {len(embeddings)}")
+
+	rows = [
+		{"name": str(i), "_embedding": e, "_embedding_int8": encode_int8(e)}
+		for i, e in enumerate(embeddings)
+	]
+	float_index = VectorIndex(None, [dict(r) for r in rows])
+	int8_index = VectorIndex(None, [dict(r) for r in rows], quantized=True)
+
+	# Queries: stored vectors with noise, so the exact neighbours are non-trivial
+	query_vectors = [
+		normalize([x + rng.gauss(0, 0.02) for x in embeddings[rng.randrange(len(embeddings))]])
+		for _ in range(int(queries))
+	]
+
+	float_time = int8_time = rerank_time = 0.0
+	recall_int8 = recall_rerank = 0.0
+	for q in query_vectors:
+		start = time.perf_counter()
+		exact = {name for name, _ in float_index.nearest(q, k)}
+		float_time += time.perf_counter() - start
+
+		start = time.perf_counter()
+		approx = int8_index.nearest(q, k * candidates)
+		int8_time += time.perf_counter() - start
+
+		start = time.perf_counter()
+		reranked = sorted(
+			((name, dot(q, float_index.vector(name))) for name, _ in approx),
+			key=operator.itemgetter(1),
+			reverse=True,
+		)[:k]
+		rerank_time += time.perf_counter() - start
+
+		recall_int8 += len(exact & {name for name, _ in approx[:k]}) / k
+		recall_rerank += len(exact & {name for name, _ in reranked}) / k
+
+	n = len(query_vectors)
+	result = {
+		"items": len(embeddings),
+		"dimensions": len(embeddings[0]),
+		"queries": n,
+		"k": k,
+		"candidates": k * candidates,
+		"float_memory_bytes": float_index.memory_bytes(),
+		"int8_memory_bytes": int8_index.memory_bytes(),
+		"float_ms": 1000 * float_time / n,
+		"int8_ms": 1000 * int8_time / n,
+		"int8_rerank_ms": 1000 * (int8_time + rerank_time) / n,
+		"int8_recall": recall_int8 / n,
+		"int8_rerank_recall": recall_rerank / n,
+	}
+	_print_report(result)
+	return result
+
+
+def _synthetic_embeddings(count: int, dim: int, rng: random.Random) -> list[list[float]]:
+	"""Clustered gaussian vectors, roughly like topical registry items."""
+	centroids = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(max(count // 50, 1))]
+	return [[c + rng.gauss(0, 0.6) for c in rng.choice(centroids)] for _ in range(count)]
+
+
+def _print_report(r: dict) -> None:
+	print(f"{r['items']} items x {r['dimensions']} dims, {r['queries']} queries, top {r['k']}")
+	print(f"{'':<22}{'memory':>12}{'ms/query':>12}{'recall@k':>12}")
+	print(f"{'float':<22}{r['float_memory_bytes'] / 1e6:>10.1f}MB{r['float_ms']:>12.2f}{1.0:>12.3f}")
+	print(f"{'int8':<22}{r['int8_memory_bytes'] / 1e6:>10.1f}MB{r['int8_ms']:>12.2f}{r['int8_recall']:>12.3f}")
+	print(
+		f"{'int8 + float rerank':<22}{'':>12}{r['int8_rerank_ms']:>12.2f}{r['int8_rerank_recall']:>12.3f}"
+	)
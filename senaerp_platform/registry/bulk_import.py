@@ -0,0 +1,451 @@
+"""Bulk import of registry items from NDJSON.
+
+Each line is one item in the install-package shape::
+
+	{"item_type": "Agent", "title": "Lisa", "slug": "lisa", "tags": ["finance"],
+	 "extension": {"agent_role": "orchestrator", "agent_tools": [{"tool": "send-email"}]}}
+
+Items are upserted by slug in transactional batches. New rows are written
+with multi-row INSERTs (Registry, tags, extension and child rows) instead of
+going through Registry.insert, and link fields inside ``extension`` may
+reference other items by slug. Search text, content hashes and embeddings
+are computed afterwards in a single background job.
+
+From the command line::
+
+	bench --site <site> execute senaerp_platform.registry.bulk_import.import_file --args "['items.ndjson']"
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+
+import frappe
+from frappe.utils import cint, now
+
+from senaerp_platform.registry.api import (
+	_CHILD_LINK_FIELDS,
+	_CHILD_TABLE_DOCTYPES,
+	_EXT_LINK_FIELDS,
+	EXTENSION_CHILDREN,
+	EXTENSION_MAP,
+	INSTALL_ORDER,
+	_data_fields,
+)
+from senaerp_platform.registry.cycles import find_cycles
+from senaerp_platform.registry.doctype.registry.registry import Registry, allocate_slugs
+
+REGISTRY_IMPORT_FIELDS = [
+	"item_type", "title", "slug", "description", "category", "dotmatrix_avatar",
+	"trust_status", "featured", "visibility", "author", "version", "source_url",
+	"readme",
+]
+
+_BATCH_SIZE = 500
+_SAVEPOINT = "registry_bulk_import"
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_import(data=None, batch_size=_BATCH_SIZE):
+	"""Import NDJSON registry items sent as ``data`` or as the raw request body."""
+	frappe.only_for("System Manager")
+	if data is None:
+		data = frappe.request.get_data(as_text=True)
+	return import_items(data.splitlines(), batch_size=cint(batch_size) or _BATCH_SIZE)
+
+
+def import_file(path, batch_size=_BATCH_SIZE):
+	"""Import an NDJSON file from disk (for ``bench execute``)."""
+	with open(path) as f:
+		result = import_items(f, batch_size=batch_size)
+	print(
+		f"{result['inserted']} inserted, {result['updated']} updated, "
+		f"{len(result['errors'])} errors"
+	)
+	return result
+
+
+def import_items(lines, batch_size=_BATCH_SIZE) -> dict:
+	"""Upsert registry items from NDJSON lines.
+
+	Returns {"inserted", "updated", "errors": [{"line", "slug", "error"}]}.
+	Invalid rows are reported and skipped; they never abort their batch.
+	"""
+	errors = []
+	rows = []
+	for lineno, line in enumerate(lines, 1):
+		line = line.strip()
+		if not line:
+			continue
+		try:
+			row = _parse_row(json.loads(line))
+		except (ValueError, frappe.ValidationError) as e:
+			errors.append({"line": lineno, "slug": None, "error": str(e)})
+			continue
+		row["_line"] = lineno
+		rows.append(row)
+
+	result = import_rows(rows, batch_size=batch_size, validated=True)
+	result["errors"] = errors + result["errors"]
+	return result
+
+
+def import_rows(rows: list[dict], batch_size=_BATCH_SIZE, validated=False) -> dict:
+	"""Upsert already-decoded item dicts (same shape as the NDJSON lines)."""
+	result = {"inserted": 0, "updated": 0, "errors": []}
+
+	if not validated:
+		valid = []
+		for i, row in enumerate(rows, 1):
+			try:
+				row = _parse_row(row)
+			except (ValueError, frappe.ValidationError) as e:
+				result["errors"].append({"line": i, "slug": None, "error": str(e)})
+				continue
+			row.setdefault("_line", i)
+			valid.append(row)
+		rows = valid
+
+	# Dependencies first, so slug links to earlier batches resolve
+	rows.sort(key=lambda r: INSTALL_ORDER.get(r["item_type"], 99))
+
+	touched = []
+	for i in range(0, len(rows), batch_size):
+		_import_batch(rows[i : i + batch_size], result, touched)
+		frappe.db.commit()
+
+	if touched:
+		frappe.enqueue(
+			"senaerp_platform.registry.bulk_import.finalize_import",
+			queue="long",
+			timeout=3600,
+			registry_names=touched,
+		)
+	return result
+
+
+def finalize_import(registry_names):
+	"""Background pass over imported items: search text, embeddings, content hashes.
+
+	Items enter the change feed here, once their content hash is known.
+	"""
+	from senaerp_platform.registry.changes import queue_changes
+	from senaerp_platform.registry.content_hash import update_content_hash
+	from senaerp_platform.registry.embedding import update_embeddings
+
+	update_embeddings(registry_names)
+	for name in registry_names:
+		update_content_hash(name)
+	queue_changes(registry_names)
+	frappe.db.commit()
+
+
+def _parse_row(row) -> dict:
+	if not isinstance(row, dict):
+		raise ValueError("Each line must be a JSON object")
+	if row.get("item_type") not in EXTENSION_MAP:
+		raise frappe.ValidationError(f"Invalid item_type: {row.get('item_type')!r}")
+	if not row.get("title"):
+		raise frappe.ValidationError("title is required")
+	if not isinstance(row.get("tags", []), list):
+		raise frappe.ValidationError("tags must be a list")
+	if not isinstance(row.get("extension") or {}, dict):
+		raise frappe.ValidationError("extension must be an object")
+	if row.get("slug"):
+		row["slug"] = Registry.normalize_slug(row["slug"])
+	return row
+
+
+def _import_batch(batch: list[dict], result: dict, touched: list[str]) -> None:
+	"""Write a batch in one go; on failure retry row by row to isolate bad rows.
+
+	Every attempt works on a copy of the parsed rows: ``_write_rows`` fills in
+	names and replaces link slugs, and a rolled back attempt must not leak
+	those (or names from the rolled back naming series) into the retry.
+	"""
+	frappe.db.savepoint(_SAVEPOINT)
+	try:
+		inserted, updated = _write_rows(copy.deepcopy(batch))
+	except Exception:
+		frappe.db.rollback(save_point=_SAVEPOINT)
+	else:
+		frappe.db.release_savepoint(_SAVEPOINT)
+		result["inserted"] += len(inserted)
+		result["updated"] += len(updated)
+		touched.extend(inserted + updated)
+		return
+
+	for row in batch:
+		frappe.db.savepoint(_SAVEPOINT)
+		try:
+			inserted, updated = _write_rows([copy.deepcopy(row)])
+		except Exception as e:
+			frappe.db.rollback(save_point=_SAVEPOINT)
+			result["errors"].append({"line": row["_line"], "slug": row.get("slug"), "error": str(e)})
+			continue
+		frappe.db.release_savepoint(_SAVEPOINT)
+		result["inserted"] += len(inserted)
+		result["updated"] += len(updated)
+		touched.extend(inserted + updated)
+
+
+def _write_rows(rows: list[dict]) -> tuple[list[str], list[str]]:
+	"""Upsert rows by slug. Returns (inserted registry names, updated registry names).
+
+	Fills in ``_name``/``_ref_name`` and resolves link slugs on ``rows`` in place.
+	"""
+	slugs = [r["slug"] for r in rows if r.get("slug")]
+	existing = {}
+	if slugs:
+		for r in frappe.get_all(
+			"Registry",
+			filters={"slug": ("in", slugs)},
+			fields=["name", "slug", "item_type", "ref_name"],
+		):
+			existing[r.slug] = r
+
+	new_rows = [r for r in rows if r.get("slug") not in existing]
+	updates = [r for r in rows if r.get("slug") in existing]
+
+	unslugged = [r for r in new_rows if not r.get("slug")]
+	for row, slug in zip(unslugged, allocate_slugs(unslugged, reserved=slugs)):
+		row["slug"] = slug
+
+	for row in updates:
+		current = existing[row["slug"]]
+		if current.item_type != row["item_type"]:
+			raise frappe.ValidationError(
+				f"Cannot change item_type of '{row['slug']}' from {current.item_type} to {row['item_type']}"
+			)
+		row["_name"] = current.name
+		row["_ref_name"] = current.ref_name
+
+	for row, name in zip(new_rows, reserve_names(frappe.get_meta("Registry").autoname, len(new_rows))):
+		row["_name"] = name
+		row["_ref_name"] = None
+
+	# Extensions to create: new items, plus existing ones that lost theirs
+	needs_ext: dict[str, list[dict]] = {}
+	for row in rows:
+		if not row["_ref_name"]:
+			needs_ext.setdefault(EXTENSION_MAP[row["item_type"]], []).append(row)
+	for ext_doctype, ext_rows in needs_ext.items():
+		autoname = frappe.get_meta(ext_doctype).autoname
+		for row, name in zip(ext_rows, reserve_names(autoname, len(ext_rows))):
+			row["_ref_name"] = name
+			row["_new_ext"] = True
+
+	_resolve_slug_links(rows)
+
+	timestamp = now()
+	_write_registry(new_rows, updates, timestamp)
+	_write_extensions(rows, timestamp)
+	_check_cycles(rows)
+
+	return [r["_name"] for r in new_rows], [r["_name"] for r in updates]
+
+
+def _check_cycles(rows: list[dict]) -> None:
+	"""Throw if the written links make any of ``rows`` depend on itself."""
+	by_doctype: dict[str, dict[str, dict]] = {}
+	for row in rows:
+		by_doctype.setdefault(EXTENSION_MAP[row["item_type"]], {})[row["_ref_name"]] = row
+	for ext_doctype, by_ref in by_doctype.items():
+		cyclic = find_cycles(ext_doctype, list(by_ref))
+		if cyclic:
+			frappe.throw(
+				f"'{by_ref[cyclic[0]]['slug']}' would depend on itself through its links",
+				title="Circular dependency",
+			)
+
+
+def _resolve_slug_links(rows: list[dict]) -> None:
+	"""Replace slug values in extension link fields with extension names.
+
+	Raises LinkValidationError for slugs that match no item of the linked type.
+	"""
+	local = {r["slug"]: (EXTENSION_MAP[r["item_type"]], r["_ref_name"]) for r in rows}
+
+	links = []  # (owning row, dict holding the link, field, target doctype)
+	for row in rows:
+		ext_doctype = EXTENSION_MAP[row["item_type"]]
+		ext = row.get("extension") or {}
+		for field, target_dt in _EXT_LINK_FIELDS.get(ext_doctype, {}).items():
+			if ext.get(field):
+				links.append((row, ext, field, target_dt))
+		for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+			child_dt = _CHILD_TABLE_DOCTYPES[child_field]
+			for child in ext.get(child_field) or []:
+				for field, target_dt in _CHILD_LINK_FIELDS.get(child_dt, {}).items():
+					if child.get(field):
+						links.append((row, child, field, target_dt))
+
+	unknown = {data[field] for _, data, field, _ in links if data[field] not in local}
+	remote = {
+		r.slug: (EXTENSION_MAP.get(r.item_type), r.ref_name)
+		for r in frappe.get_all(
+			"Registry",
+			filters={"slug": ("in", list(unknown))},
+			fields=["slug", "item_type", "ref_name"],
+		)
+	} if unknown else {}
+
+	for row, data, field, target_dt in links:
+		slug = data[field]
+		ext_doctype, ext_name = local.get(slug) or remote.get(slug) or (None, None)
+		if ext_doctype != target_dt or not ext_name:
+			item_type = next((t for t, dt in EXTENSION_MAP.items() if dt == target_dt), target_dt)
+			frappe.throw(
+				f"'{row['slug']}': {field} '{slug}' does not match any {item_type} item",
+				frappe.LinkValidationError,
+			)
+		data[field] = ext_name
+
+
+def _write_registry(new_rows: list[dict], updates: list[dict], timestamp: str) -> None:
+	inserts = []
+	for row in new_rows:
+		values = _doc_values("Registry", row, REGISTRY_IMPORT_FIELDS, with_defaults=True)
+		values.update(_std_values(row["_name"], timestamp))
+		values["ref_name"] = row["_ref_name"]
+		values["install_count"] = 0
+		inserts.append(values)
+	bulk_insert_docs("Registry", inserts)
+
+	for row in updates:
+		values = _doc_values("Registry", row, REGISTRY_IMPORT_FIELDS)
+		values.pop("slug", None)
+		values["ref_name"] = row["_ref_name"]
+		# Clear the hash so cached packages containing this item are invalidated
+		# until the background pass recomputes it
+		values["content_hash"] = None
+		frappe.db.set_value("Registry", row["_name"], values, modified=timestamp)
+
+	tagged = [r for r in new_rows + updates if "tags" in r]
+	_replace_children(
+		"Registry Tag", "Registry", "tags",
+		{r["_name"]: [{"tag": str(t)} for t in r["tags"]] for r in tagged},
+		replace=[r["_name"] for r in updates if "tags" in r],
+		timestamp=timestamp,
+	)
+
+
+def _write_extensions(rows: list[dict], timestamp: str) -> None:
+	by_doctype: dict[str, list[dict]] = {}
+	for row in rows:
+		by_doctype.setdefault(EXTENSION_MAP[row["item_type"]], []).append(row)
+
+	for ext_doctype, ext_rows in by_doctype.items():
+		fields = _data_fields(ext_doctype)
+
+		inserts = []
+		for row in ext_rows:
+			ext = row.get("extension") or {}
+			if row.get("_new_ext"):
+				values = _doc_values(ext_doctype, ext, fields, with_defaults=True)
+				values.update(_std_values(row["_ref_name"], timestamp))
+				values["registry"] = row["_name"]
+				inserts.append(values)
+			else:
+				values = _doc_values(ext_doctype, ext, fields)
+				values.pop("registry", None)
+				if values:
+					frappe.db.set_value(ext_doctype, row["_ref_name"], values, modified=timestamp)
+		bulk_insert_docs(ext_doctype, inserts)
+
+		for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+			provided = [r for r in ext_rows if child_field in (r.get("extension") or {})]
+			_replace_children(
+				_CHILD_TABLE_DOCTYPES[child_field], ext_doctype, child_field,
+				{r["_ref_name"]: r["extension"][child_field] or [] for r in provided},
+				replace=[r["_ref_name"] for r in provided if not r.get("_new_ext")],
+				timestamp=timestamp,
+			)
+
+
+def _replace_children(child_doctype, parent_doctype, parentfield, children_by_parent, replace, timestamp):
+	"""Delete existing child rows of ``replace`` parents, then multi-row insert new ones."""
+	if replace:
+		frappe.db.delete(child_doctype, {
+			"parent": ("in", replace),
+			"parenttype": parent_doctype,
+			"parentfield": parentfield,
+		})
+
+	fields = _data_fields(child_doctype)
+	inserts = []
+	for parent, children in children_by_parent.items():
+		for idx, child in enumerate(children, 1):
+			values = _doc_values(child_doctype, child, fields, with_defaults=True)
+			values.update(_std_values(frappe.generate_hash(length=10), timestamp))
+			values.update({
+				"parent": parent,
+				"parenttype": parent_doctype,
+				"parentfield": parentfield,
+				"idx": idx,
+			})
+			inserts.append(values)
+	bulk_insert_docs(child_doctype, inserts)
+
+
+def _doc_values(doctype: str, data: dict, fields: list[str], with_defaults=False) -> dict:
+	"""Pick known fields from ``data``, applying DocType defaults for inserts."""
+	meta = frappe.get_meta(doctype)
+	values = {}
+	for field in fields:
+		if field in data:
+			value = data[field]
+			if isinstance(value, (dict, list)):
+				value = json.dumps(value)
+			values[field] = value
+		elif with_defaults:
+			df = meta.get_field(field)
+			values[field] = df.default if df and df.default is not None else None
+	return values
+
+
+def _std_values(name: str, timestamp: str) -> dict:
+	return {
+		"name": name,
+		"owner": frappe.session.user,
+		"creation": timestamp,
+		"modified": timestamp,
+		"modified_by": frappe.session.user,
+		"docstatus": 0,
+	}
+
+
+def bulk_insert_docs(doctype: str, rows: list[dict]) -> None:
+	"""Multi-row INSERT of raw column dicts (all rows are padded to the same columns)."""
+	if not rows:
+		return
+	fields = list(dict.fromkeys(f for row in rows for f in row))
+	frappe.db.bulk_insert(doctype, fields, [[row.get(f) for f in fields] for row in rows])
+
+
+def reserve_names(autoname: str, count: int) -> list[str]:
+	"""Reserve ``count`` consecutive names from a naming series like ``REG-.#####``.
+
+	Equivalent to calling make_autoname ``count`` times, but with one locked
+	read and one write on tabSeries.
+	"""
+	if count <= 0:
+		return []
+	prefix, hashes = autoname.split(".", 1)
+	digits = len(hashes)
+
+	current = frappe.db.sql(
+		"SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE", (prefix,)
+	)
+	if current:
+		start = cint(current[0][0])
+		frappe.db.sql(
+			"UPDATE `tabSeries` SET `current` = %s WHERE `name` = %s", (start + count, prefix)
+		)
+	else:
+		start = 0
+		frappe.db.sql(
+			"INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)", (prefix, count)
+		)
+	return [f"{prefix}{str(start + i).zfill(digits)}" for i in range(1, count + 1)]
@@ -0,0 +1,145 @@
+"""Static catalog snapshot.
+
+The public catalog (approved, public items with their list fields and tags)
+is written to ``/files/registry-catalog/`` as ``catalog-<hash>.json`` plus
+pre-compressed ``.gz`` (and ``.br`` when brotli is installed) siblings, so it
+can be served straight from nginx or a CDN with immutable caching. Clients
+read ``registry.catalog.catalog_manifest`` to find the current file and can
+filter small catalogs locally instead of calling ``search``.
+
+A refresh is queued after every committed registry change, one job per
+registry version; it only writes new files when the catalog content actually
+changed, and never replaces a snapshot of a newer version.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+
+import frappe
+from frappe.utils import now
+
+from senaerp_platform.registry.api import SEARCH_FIELDS, _load_tags
+from senaerp_platform.registry.changes import get_registry_version
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+CATALOG_DIR = "registry-catalog"
+CATALOG_FIELDS = [f for f in SEARCH_FIELDS if f != "name"] + ["dotmatrix_avatar"]
+
+_MANIFEST_KEY = "registry_catalog_manifest"
+_KEEP_SNAPSHOTS = 3
+
+
+@frappe.whitelist(allow_guest=True)
+def catalog_manifest():
+	"""Return the current catalog file: {version, hash, count, generated, files: {json, gzip, br}}."""
+	manifest = frappe.cache.get_value(_MANIFEST_KEY, generator=_stored_manifest)
+	if not manifest:
+		frappe.throw("Catalog snapshot has not been built yet", frappe.DoesNotExistError)
+	return manifest
+
+
+def enqueue_catalog_refresh() -> None:
+	# Deduplicate per version: a job already running may have read an older one
+	frappe.enqueue(
+		"senaerp_platform.registry.catalog.refresh_catalog_snapshot",
+		queue="long",
+		job_id=f"registry_catalog_snapshot:{get_registry_version()}",
+		deduplicate=True,
+	)
+
+
+def refresh_catalog_snapshot() -> dict:
+	"""Rebuild the catalog snapshot if the registry version moved. Returns the manifest."""
+	version = get_registry_version()
+	manifest = _stored_manifest()
+	if manifest and manifest["version"] == version:
+		return manifest
+
+	items = _catalog_items()
+	content_hash = hashlib.sha256(json.dumps(items, default=str).encode()).hexdigest()[:16]
+
+	if not manifest or manifest["hash"] != content_hash:
+		payload = json.dumps(
+			{"hash": content_hash, "items": items}, separators=(",", ":"), ensure_ascii=False, default=str
+		).encode()
+		files = _write_snapshot(content_hash, payload)
+	else:
+		files = manifest["files"]
+
+	latest = _stored_manifest()
+	if latest and latest["version"] > version:
+		return latest  # A job for a newer version finished first
+
+	manifest = {
+		"version": version,
+		"hash": content_hash,
+		"count": len(items),
+		"generated": now(),
+		"files": files,
+	}
+	frappe.db.set_global(_MANIFEST_KEY, json.dumps(manifest))
+	frappe.db.commit()
+	frappe.cache.delete_value(_MANIFEST_KEY)
+	return manifest
+
+
+def _stored_manifest() -> dict | None:
+	value = frappe.db.get_global(_MANIFEST_KEY)
+	return json.loads(value) if value else None
+
+
+def _catalog_items() -> list[dict]:
+	rows = frappe.get_all(
+		"Registry",
+		filters={"trust_status": "approved", "visibility": "public"},
+		fields=["name", *CATALOG_FIELDS],
+		order_by="slug asc",
+	)
+	tags = _load_tags([r.name for r in rows])
+	for row in rows:
+		row["tags"] = tags.get(row.pop("name"), [])
+	return rows
+
+
+def _write_snapshot(content_hash: str, payload: bytes) -> dict:
+	directory = frappe.get_site_path("public", "files", CATALOG_DIR)
+	os.makedirs(directory, exist_ok=True)
+
+	base = f"catalog-{content_hash}.json"
+	variants = {"json": (base, payload), "gzip": (f"{base}.gz", gzip.compress(payload, 9))}
+	if brotli:
+		variants["br"] = (f"{base}.br", brotli.compress(payload))
+
+	files = {}
+	for kind, (filename, data) in variants.items():
+		path = os.path.join(directory, filename)
+		with open(f"{path}.tmp", "wb") as f:
+			f.write(data)
+		os.replace(f"{path}.tmp", path)
+		files[kind] = f"/files/{CATALOG_DIR}/{filename}"
+
+	_prune_snapshots(directory, keep=base)
+	return files
+
+
+def _prune_snapshots(directory: str, keep: str) -> None:
+	"""Delete all but the newest few snapshots (clients may still hold older manifests)."""
+	bases = sorted(
+		(f for f in os.listdir(directory) if f.startswith("catalog-") and f.endswith(".json")),
+		key=lambda f: os.path.getmtime(os.path.join(directory, f)),
+		reverse=True,
+	)
+	stale = [b for b in bases[_KEEP_SNAPSHOTS:] if b != keep]
+	for base in stale:
+		for suffix in ("", ".gz", ".br"):
+			path = os.path.join(directory, base + suffix)
+			if os.path.exists(path):
+				os.remove(path)
@@ -0,0 +1,130 @@
+"""Registry change feed.
+
+Registry and extension saves queue the affected item; right before the
+transaction commits, one ``Registry Change`` row per item is appended with
+the item's final slug, content hash and operation. The autoincrement name is
+the sequence number tenants page through via ``registry.api.changes``.
+
+Every change gets a row, since the feed's sequence is also the registry
+version that caches key on, but only rows flagged ``published`` are served to
+tenants: those of approved, public items, plus a ``delete`` when an item
+leaves that state or is removed after having been published.
+
+The operation is derived from the published entries: the first one for a
+slug (or the first one after a delete) is an ``insert``, later ones ``update``.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import now
+
+_VERSION_CACHE_KEY = "registry_version"
+
+
+def queue_change(registry_name: str) -> None:
+	"""Record that a registry item changed in the current transaction."""
+	_pending()["changed"].add(registry_name)
+
+
+def queue_changes(registry_names) -> None:
+	_pending()["changed"].update(registry_names)
+
+
+def queue_delete(registry_name: str, slug: str, item_type: str | None = None) -> None:
+	"""Record that a registry item is deleted in the current transaction."""
+	pending = _pending()
+	pending["changed"].discard(registry_name)
+	pending["deleted"][slug] = item_type
+
+
+def get_registry_version() -> int:
+	"""Sequence number of the latest change; bumps on every committed registry change."""
+	return frappe.cache.get_value(_VERSION_CACHE_KEY, generator=_latest_seq) or 0
+
+
+def _latest_seq() -> int:
+	return frappe.db.sql("SELECT IFNULL(MAX(`name`), 0) FROM `tabRegistry Change`")[0][0]
+
+
+def _pending() -> dict:
+	pending = getattr(frappe.local, "registry_pending_changes", None)
+	if pending is None:
+		pending = frappe.local.registry_pending_changes = {"changed": set(), "deleted": {}}
+		frappe.db.before_commit.add(_flush_pending)
+		frappe.db.after_rollback.add(_discard_pending)
+	return pending
+
+
+def _discard_pending() -> None:
+	frappe.local.registry_pending_changes = None
+
+
+def _flush_pending() -> None:
+	pending = getattr(frappe.local, "registry_pending_changes", None)
+	frappe.local.registry_pending_changes = None
+	if not pending:
+		return
+
+	changed = pending["changed"]
+	current = frappe.get_all(
+		"Registry",
+		filters={"name": ("in", list(changed))},
+		fields=["slug", "item_type", "content_hash", "trust_status", "visibility"],
+	) if changed else []
+
+	# A slug deleted and re-created in the same transaction is just an update
+	live = {r.slug for r in current}
+	deleted = {slug: item_type for slug, item_type in pending["deleted"].items() if slug not in live}
+
+	listed = {slug for slug, op in _last_ops([*live, *deleted]).items() if op != "delete"}
+	rows = [(slug, "delete", item_type, None, int(slug in listed)) for slug, item_type in deleted.items()]
+	for r in current:
+		if is_published(r):
+			op = "update" if r.slug in listed else "insert"
+			rows.append((r.slug, op, r.item_type, r.content_hash, 1))
+		elif r.slug in listed:
+			rows.append((r.slug, "delete", r.item_type, None, 1))  # Withdrawn
+		else:
+			rows.append((r.slug, "update", r.item_type, r.content_hash, 0))
+
+	if not rows:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+	frappe.db.bulk_insert(
+		"Registry Change",
+		[
+			"slug", "op", "item_type", "content_hash", "published",
+			"creation", "modified", "owner", "modified_by",
+		],
+		[(*row, timestamp, timestamp, user, user) for row in rows],
+	)
+	frappe.db.after_commit.add(_on_version_change)
+
+
+def _on_version_change() -> None:
+	from senaerp_platform.registry.catalog import enqueue_catalog_refresh
+
+	frappe.cache.delete_value(_VERSION_CACHE_KEY)
+	enqueue_catalog_refresh()
+
+
+def is_published(row) -> bool:
+	"""Whether a Registry row (with ``trust_status`` and ``visibility``) belongs in the public feed."""
+	return row.trust_status == "approved" and row.visibility == "public"
+
+
+def _last_ops(slugs: list[str]) -> dict[str, str]:
+	"""Latest published feed operation per slug, in one query."""
+	if not slugs:
+		return {}
+	return dict(frappe.db.sql(
+		"""SELECT c.`slug`, c.`op` FROM `tabRegistry Change` c
+		JOIN (
+			SELECT MAX(`name`) AS seq FROM `tabRegistry Change`
+			WHERE `slug` IN %(slugs)s AND `published` = 1 GROUP BY `slug`
+		) latest ON latest.seq = c.`name`""",
+		{"slugs": tuple(slugs)},
+	))
@@ -0,0 +1,91 @@
+"""Content hashes for registry items.
+
+Every Registry row stores a sha256 over its install-package representation
+(registry fields + extension data with links resolved to slugs). Install
+packages combine the hashes of their members into a single Merkle-style
+root, which doubles as the package ETag.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+
+import frappe
+
+
+def compute_content_hash(item: dict) -> str:
+	"""Hash an install-package item dict in a key-order independent way."""
+	payload = json.dumps(item, sort_keys=True, separators=(",", ":"), default=str)
+	return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def package_hash(member_hashes: dict[str, str | None]) -> str:
+	"""Combine {registry_name: content_hash} into a single root hash."""
+	h = hashlib.sha256()
+	for name in sorted(member_hashes):
+		h.update(f"{name}:{member_hashes[name] or ''}\n".encode())
+	return h.hexdigest()
+
+
+def get_content_hashes(registry_names) -> dict[str, str | None]:
+	"""Fetch stored content hashes for a set of registry items in one query."""
+	if not registry_names:
+		return {}
+	rows = frappe.get_all(
+		"Registry",
+		filters={"name": ("in", list(registry_names))},
+		fields=["name", "content_hash"],
+	)
+	return {r.name: r.content_hash for r in rows}
+
+
+def update_content_hash(registry_name: str) -> str | None:
+	"""Recompute and store the content hash of a single registry item."""
+	from senaerp_platform.registry.api import _build_package_item
+
+	item = _build_package_item(registry_name)
+	if not item:
+		return None
+
+	content_hash = compute_content_hash(item)
+	if frappe.db.get_value("Registry", registry_name, "content_hash") != content_hash:
+		frappe.db.set_value("Registry", registry_name, "content_hash", content_hash, update_modified=False)
+	return content_hash
+
+
+def update_parent_hashes(registry_name: str) -> list[str]:
+	"""Recompute the hashes of the items that link to ``registry_name``.
+
+	Package items reference their dependencies by slug, so renaming an item
+	changes the content of its direct parents (but of nothing further up).
+	Returns the parents' registry names.
+	"""
+	from senaerp_platform.registry.api import EXTENSION_MAP, _load_parents
+	from senaerp_platform.registry.changes import queue_changes
+
+	reg = frappe.db.get_value("Registry", registry_name, ["item_type", "ref_name"], as_dict=True)
+	ext_doctype = EXTENSION_MAP.get(reg.item_type) if reg else None
+	if not ext_doctype or not reg.ref_name:
+		return []
+
+	key = (ext_doctype, reg.ref_name)
+	parent_slugs = [p.slug for p in _load_parents({ext_doctype: [reg.ref_name]}).get(key, [])]
+	if not parent_slugs:
+		return []
+	parents = frappe.get_all("Registry", filters={"slug": ("in", parent_slugs)}, pluck="name")
+	for name in parents:
+		update_content_hash(name)
+	queue_changes(parents)
+	return parents
+
+
+@frappe.whitelist()
+def rebuild_content_hashes():
+	"""Recompute content hashes for all registry items."""
+	frappe.only_for("System Manager")
+	items = frappe.get_all("Registry", pluck="name")
+	for name in items:
+		update_content_hash(name)
+	frappe.db.commit()
+	return {"total": len(items)}
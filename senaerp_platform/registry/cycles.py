@@ -0,0 +1,133 @@
+"""Reject extension links that would close a dependency cycle.
+
+Installs walk the link graph (cluster -> team -> agent -> tools/skills/...),
+so a cycle would make packages unbounded. When an extension is saved, only
+its *new* outgoing links can create one, and only if the document is
+reachable from a new target. Two things keep the check cheap:
+
+- Link fields are typed, so the DocType-level graph says which extension
+  types can ever lead back to the saved one. Links into types that cannot are
+  skipped without a query (with today's link fields, that is all of them).
+- Otherwise the search walks the graph level by level from the new targets,
+  with one query per DocType and child table per level, visiting each node
+  once and following only links into types that can still lead back.
+
+Bulk imports write links without the controllers and call ``find_cycles``
+on the imported extensions instead.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+
+import frappe
+
+from senaerp_platform.registry.api import (
+	_CHILD_LINK_FIELDS,
+	_CHILD_TABLE_DOCTYPES,
+	_EXT_LINK_FIELDS,
+	EXTENSION_CHILDREN,
+)
+
+
+def validate_no_cycles(doc) -> None:
+	"""Throw if ``doc``'s new links make it reachable from itself."""
+	if doc.is_new():
+		return  # Nothing links to it yet
+	before = doc.get_doc_before_save()
+	added = _links(doc) - (_links(before) if before else set())
+	if reaches((doc.doctype, doc.name), added):
+		_throw_cycle(doc)
+
+
+def find_cycles(ext_doctype: str, names: list[str]) -> list[str]:
+	"""Extensions among ``names`` that are reachable from themselves through saved links.
+
+	For writes that bypass the controllers, such as bulk imports, once the
+	links are stored.
+	"""
+	if not names or ext_doctype not in reachable_types(ext_doctype):
+		return []
+	return [name for name in names if reaches((ext_doctype, name), _stored_links(ext_doctype, [name]))]
+
+
+def reaches(source: tuple[str, str], targets) -> bool:
+	"""Whether ``source`` is reachable from any of ``targets`` through saved links."""
+	frontier = {target for target in targets if source[0] in reachable_types(target[0])}
+	seen = set(frontier)
+	while frontier:
+		if source in frontier:
+			return True
+		by_doctype: dict[str, list[str]] = {}
+		for ext_doctype, name in frontier:
+			by_doctype.setdefault(ext_doctype, []).append(name)
+		frontier = set()
+		for ext_doctype, names in by_doctype.items():
+			for target in _stored_links(ext_doctype, names):
+				if target not in seen and source[0] in reachable_types(target[0]):
+					seen.add(target)
+					frontier.add(target)
+	return False
+
+
+@cache
+def reachable_types(ext_doctype: str) -> frozenset[str]:
+	"""Extension DocTypes reachable from ``ext_doctype`` through one or more links."""
+	reached: set[str] = set()
+	stack = list(_link_types(ext_doctype))
+	while stack:
+		target = stack.pop()
+		if target not in reached:
+			reached.add(target)
+			stack.extend(_link_types(target))
+	return frozenset(reached)
+
+
+def _link_types(ext_doctype: str) -> set[str]:
+	types = set(_EXT_LINK_FIELDS.get(ext_doctype, {}).values())
+	for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+		types.update(_CHILD_LINK_FIELDS.get(_CHILD_TABLE_DOCTYPES[child_field], {}).values())
+	return types
+
+
+def _links(doc) -> set[tuple[str, str]]:
+	"""(target DocType, target name) for every link set on an in-memory document."""
+	links = {
+		(target_dt, doc.get(field))
+		for field, target_dt in _EXT_LINK_FIELDS.get(doc.doctype, {}).items()
+		if doc.get(field)
+	}
+	for child_field in EXTENSION_CHILDREN.get(doc.doctype, []):
+		child_links = _CHILD_LINK_FIELDS.get(_CHILD_TABLE_DOCTYPES[child_field], {})
+		for row in doc.get(child_field) or []:
+			links.update(
+				(target_dt, row.get(field)) for field, target_dt in child_links.items() if row.get(field)
+			)
+	return links
+
+
+def _stored_links(ext_doctype: str, names: list[str]) -> set[tuple[str, str]]:
+	"""Saved outgoing links of several extensions of one DocType, in bulk."""
+	links = set()
+	ext_links = _EXT_LINK_FIELDS.get(ext_doctype, {})
+	if ext_links:
+		for row in frappe.get_all(ext_doctype, filters={"name": ("in", names)}, fields=list(ext_links)):
+			links.update((target_dt, row[field]) for field, target_dt in ext_links.items() if row[field])
+	for child_field in EXTENSION_CHILDREN.get(ext_doctype, []):
+		child_dt = _CHILD_TABLE_DOCTYPES[child_field]
+		child_links = _CHILD_LINK_FIELDS.get(child_dt, {})
+		for row in frappe.get_all(
+			child_dt,
+			filters={"parent": ("in", names), "parenttype": ext_doctype, "parentfield": child_field},
+			fields=list(child_links),
+		):
+			links.update((target_dt, row[field]) for field, target_dt in child_links.items() if row[field])
+	return links
+
+
+def _throw_cycle(doc) -> None:
+	title = frappe.db.get_value("Registry", doc.registry, "title") if doc.get("registry") else doc.name
+	frappe.throw(
+		f"This change would make '{title}' depend on itself. Remove the link that closes the loop.",
+		title="Circular dependency",
+	)
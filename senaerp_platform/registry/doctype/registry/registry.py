@@ -1,7 +1,9 @@
+import hashlib
 import re
 
 import frappe
 from frappe.model.document import Document
+from frappe.utils import flt
 
 
 # Maps item_type → (extension DocType name, autoname prefix)
@@ -22,24 +24,32 @@ class Registry(Document):
 	def validate(self):
 		self.ensure_slug()
 		self.rebuild_search_text()
+		self.warn_if_duplicate()
 
 	def ensure_slug(self):
-		if not self.slug:
-			self.slug = self.generate_slug(self.title)
-		self.slug = self.slug.lower().strip()
-		self.slug = re.sub(r"[^a-z0-9-]", "-", self.slug)
-		self.slug = re.sub(r"-+", "-", self.slug).strip("-")
-		# Ensure uniqueness — append -2, -3, etc. if slug already taken
-		base_slug = self.slug
-		counter = 1
-		while frappe.db.exists("Registry", {"slug": self.slug, "name": ("!=", self.name or "")}):
-			counter += 1
-			self.slug = f"{base_slug}-{counter}"
+		self.slug = slug_base(self.slug, self.title, self.item_type)
+		# Ensure uniqueness — append -2, -3, etc. if slug already taken. Concurrent
+		# inserts racing for the same suffix are rejected by the unique index.
+		self.slug = next_free_slug(self.slug, get_taken_slugs([self.slug], exclude=self.name))
 
 	def rebuild_search_text(self):
 		from senaerp_platform.registry.embedding import build_search_text
 		self._search_text = build_search_text(self)
 
+	def warn_if_duplicate(self):
+		if self.trust_status != "approved" or not self.duplicate_of:
+			return
+		if not self.has_value_changed("trust_status"):
+			return
+		duplicate = frappe.db.get_value("Registry", self.duplicate_of, ["slug", "title"], as_dict=True)
+		if duplicate:
+			frappe.msgprint(
+				f"{self.title} looks like a near-duplicate of {duplicate.title} ({duplicate.slug}), "
+				f"similarity {flt(self.duplicate_score):.2f}.",
+				title="Possible Duplicate",
+				indicator="orange",
+			)
+
 	def after_insert(self):
 		self.create_extension()
 
@@ -54,8 +64,83 @@ class Registry(Document):
 
 		self.db_set("ref_name", ext.name, update_modified=False)
 
+	def on_update(self):
+		self.update_content_hash()
+		self.log_change()
+		if self.has_value_changed("trust_status"):
+			self.refresh_duplicate_flags()
+		if self.has_value_changed("readme"):
+			self.update_passages()
+		self.invalidate_search_indexes()
+
+	def update_content_hash(self):
+		from senaerp_platform.registry.content_hash import update_content_hash, update_parent_hashes
+		self.content_hash = update_content_hash(self.name)
+		before = self.get_doc_before_save()
+		if before and before.slug != self.slug:
+			update_parent_hashes(self.name)
+
+	def invalidate_search_indexes(self):
+		"""Drop the vector and passage indexes when the metadata they filter on changed."""
+		from senaerp_platform.registry.passages import invalidate_passage_index
+		from senaerp_platform.registry.vector_index import META_FIELDS, invalidate_index
+		before = self.get_doc_before_save()
+		if not before or all(before.get(f) == self.get(f) for f in META_FIELDS):
+			return
+		if self._embedding:
+			invalidate_index()
+		if frappe.db.exists("Registry Passage", {"registry": self.name}):
+			invalidate_passage_index()
+
+	def refresh_duplicate_flags(self):
+		"""Re-check this item and every item that lists it as a neighbour."""
+		from senaerp_platform.registry.duplicates import update_duplicate_flags
+		names = frappe.get_all("Registry Neighbour", filters={"neighbour": self.name}, pluck="registry")
+		update_duplicate_flags([self.name, *names])
+
+	def update_passages(self):
+		from senaerp_platform.registry.passages import enqueue_passage_update
+		enqueue_passage_update(self.name)
+
+	def log_change(self):
+		from senaerp_platform.registry.changes import queue_change, queue_delete
+		before = self.get_doc_before_save()
+		if before and before.slug != self.slug:
+			# Tenants drop the old slug. queue_delete unqueues the item, so it goes first.
+			queue_delete(self.name, before.slug, self.item_type)
+		queue_change(self.name)
+
 	def on_trash(self):
+		from senaerp_platform.registry.changes import queue_delete
+		queue_delete(self.name, self.slug, self.item_type)
 		self.delete_extension()
+		self.delete_neighbours()
+		self.clear_duplicate_references()
+		self.delete_passages()
+
+	def delete_neighbours(self):
+		from senaerp_platform.registry.neighbours import delete_neighbours
+		from senaerp_platform.registry.vector_index import invalidate_index
+		delete_neighbours(self.name)
+		if self._embedding:
+			invalidate_index()
+
+	def clear_duplicate_references(self):
+		"""Unflag items marked as duplicates of this one, so the link check lets the delete through."""
+		from senaerp_platform.registry.duplicates import update_duplicate_flags
+		flagged = frappe.get_all("Registry", filters={"duplicate_of": self.name}, pluck="name")
+		if not flagged:
+			return
+		frappe.db.sql(
+			"UPDATE `tabRegistry` SET `duplicate_of` = NULL, `duplicate_score` = 0 WHERE `duplicate_of` = %s",
+			self.name,
+		)
+		# They may still resemble another approved item; neighbours pointing here are gone by now
+		update_duplicate_flags(flagged)
+
+	def delete_passages(self):
+		from senaerp_platform.registry.passages import delete_passages
+		delete_passages(self.name)
 
 	def delete_extension(self):
 		if not self.ref_name:
@@ -64,6 +149,12 @@ class Registry(Document):
 		if ext_doctype and frappe.db.exists(ext_doctype, self.ref_name):
 			frappe.delete_doc(ext_doctype, self.ref_name, ignore_permissions=True)
 
+	@staticmethod
+	def normalize_slug(slug):
+		slug = slug.lower().strip()
+		slug = re.sub(r"[^a-z0-9-]", "-", slug)
+		return re.sub(r"-+", "-", slug).strip("-")
+
 	@staticmethod
 	def generate_slug(title):
 		slug = title.lower().strip()
@@ -71,3 +162,57 @@ class Registry(Document):
 		slug = re.sub(r"[\s]+", "-", slug)
 		slug = re.sub(r"-+", "-", slug).strip("-")
 		return slug
+
+
+def slug_base(slug, title, item_type=None) -> str:
+	"""Normalized ``slug``, or a slug generated from ``title`` when none is given.
+
+	Falls back to the item type, then to a hash of the title, when nothing
+	usable is left (e.g. symbol-only titles).
+	"""
+	base = Registry.normalize_slug(slug or Registry.generate_slug(title or ""))
+	if not base and item_type:
+		base = Registry.normalize_slug(item_type)
+	return base or hashlib.sha1((title or "").encode()).hexdigest()[:8]
+
+
+def get_taken_slugs(base_slugs, exclude=None) -> set[str]:
+	"""Return existing slugs that start with any of the given bases, in one query."""
+	bases = {b for b in base_slugs if b}
+	if not bases:
+		return set()
+	filters = {"name": ("!=", exclude)} if exclude else None
+	return set(frappe.get_all(
+		"Registry",
+		filters=filters,
+		or_filters=[["slug", "like", f"{base}%"] for base in bases],
+		pluck="slug",
+	))
+
+
+def next_free_slug(base, taken) -> str:
+	"""Return ``base`` or the lowest ``base-N`` (N >= 2) that is not in ``taken``."""
+	if base not in taken:
+		return base
+	counter = 2
+	while f"{base}-{counter}" in taken:
+		counter += 1
+	return f"{base}-{counter}"
+
+
+def allocate_slugs(items, reserved=()) -> list[str]:
+	"""Assign unique slugs to a whole import set before insert.
+
+	Takes item dicts with ``title`` and optionally ``slug`` and ``item_type``,
+	derives each base like ``Registry.ensure_slug`` and resolves collisions
+	against the database, ``reserved`` and within the batch itself, using a
+	single query.
+	"""
+	bases = [slug_base(i.get("slug"), i.get("title"), i.get("item_type")) for i in items]
+	taken = get_taken_slugs(bases) | set(reserved)
+	allocated = []
+	for base in bases:
+		slug = next_free_slug(base, taken)
+		taken.add(slug)
+		allocated.append(slug)
+	return allocated
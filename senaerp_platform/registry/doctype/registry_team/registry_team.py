@@ -1,6 +1,5 @@
-import frappe
-from frappe.model.document import Document
+from senaerp_platform.registry.extension import RegistryExtension
 
 
-class RegistryTeam(Document):
+class RegistryTeam(RegistryExtension):
 	pass
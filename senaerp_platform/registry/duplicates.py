@@ -0,0 +1,114 @@
+"""Near-duplicate detection for registry submissions.
+
+An unreviewed item is flagged (``duplicate_of`` / ``duplicate_score``) when
+one of its precomputed neighbours is an approved item with similarity at or
+above ``DUPLICATE_THRESHOLD``. Because neighbour lists are already
+maintained by the embedding pipeline, a whole backlog is checked with a
+single join instead of comparing vectors pairwise.
+"""
+
+from __future__ import annotations
+
+import frappe
+
+from senaerp_platform.registry.neighbours import MIN_NEIGHBOUR_SCORE
+
+DUPLICATE_THRESHOLD = max(0.92, MIN_NEIGHBOUR_SCORE)
+
+_UPDATE_BATCH_SIZE = 500
+
+
+@frappe.whitelist()
+def flag_duplicates(registry_names=None) -> dict:
+	"""Flag (or clear) possible duplicates for ``registry_names``, or for every unreviewed item."""
+	frappe.only_for("System Manager")
+	if registry_names is None:
+		registry_names = frappe.get_all("Registry", filters={"trust_status": "unreviewed"}, pluck="name")
+	else:
+		registry_names = frappe.parse_json(registry_names)
+
+	flagged = update_duplicate_flags(registry_names)
+	frappe.db.commit()
+	return {"checked": len(registry_names), "flagged": flagged}
+
+
+@frappe.whitelist()
+def get_duplicates(limit=100) -> list[dict]:
+	"""Moderation queue view: flagged unreviewed items with the approved item they resemble."""
+	frappe.only_for("System Manager")
+	return frappe.db.sql(
+		"""
+		SELECT r.slug, r.title, r.item_type, r.duplicate_score,
+			d.slug AS duplicate_slug, d.title AS duplicate_title
+		FROM `tabRegistry` r
+		JOIN `tabRegistry` d ON d.name = r.duplicate_of
+		WHERE r.trust_status = 'unreviewed'
+		ORDER BY r.duplicate_score DESC
+		LIMIT %(limit)s
+		""",
+		{"limit": frappe.utils.cint(limit)},
+		as_dict=True,
+	)
+
+
+def update_duplicate_flags(registry_names) -> int:
+	"""Recompute duplicate flags for unreviewed items among ``registry_names``. Returns the flag count."""
+	flagged = 0
+	names = list(registry_names)
+	for i in range(0, len(names), _UPDATE_BATCH_SIZE):
+		batch = names[i : i + _UPDATE_BATCH_SIZE]
+		matches = find_duplicates(batch)
+		_write_flags(batch, matches)
+		flagged += len(matches)
+	return flagged
+
+
+def find_duplicates(registry_names) -> dict[str, tuple[str, float]]:
+	"""{unreviewed item: (best matching approved item, score)} for the given items, in one query."""
+	if not registry_names:
+		return {}
+	matches = {}
+	for registry, neighbour, score in frappe.db.sql(
+		"""
+		SELECT n.registry, n.neighbour, n.score
+		FROM `tabRegistry Neighbour` n
+		JOIN `tabRegistry` src ON src.name = n.registry
+		JOIN `tabRegistry` r ON r.name = n.neighbour
+		WHERE n.registry IN %(names)s
+			AND n.score >= %(threshold)s
+			AND src.trust_status = 'unreviewed'
+			AND r.trust_status = 'approved'
+		ORDER BY n.registry, n.position
+		""",
+		{"names": tuple(registry_names), "threshold": DUPLICATE_THRESHOLD},
+	):
+		matches.setdefault(registry, (neighbour, score))
+	return matches
+
+
+def _write_flags(registry_names: list[str], matches: dict[str, tuple[str, float]]) -> None:
+	"""Clear stale flags and set new ones with two UPDATEs per batch."""
+	cleared = [n for n in registry_names if n not in matches]
+	if cleared:
+		frappe.db.sql(
+			"""UPDATE `tabRegistry` SET `duplicate_of` = NULL, `duplicate_score` = 0
+			WHERE `name` IN %(names)s AND `duplicate_of` IS NOT NULL""",
+			{"names": tuple(cleared)},
+		)
+	if not matches:
+		return
+
+	values = {}
+	of_cases = []
+	score_cases = []
+	for i, (name, (neighbour, score)) in enumerate(matches.items()):
+		values.update({f"n{i}": name, f"d{i}": neighbour, f"s{i}": score})
+		of_cases.append(f"WHEN %(n{i})s THEN %(d{i})s")
+		score_cases.append(f"WHEN %(n{i})s THEN %(s{i})s")
+	frappe.db.sql(
+		f"""UPDATE `tabRegistry`
+		SET `duplicate_of` = CASE `name` {" ".join(of_cases)} END,
+			`duplicate_score` = CASE `name` {" ".join(score_cases)} END
+		WHERE `name` IN ({", ".join(f"%(n{i})s" for i in range(len(matches)))})""",
+		values,
+	)
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import math
 import os
@@ -5,6 +6,9 @@ import urllib.request
 import urllib.error
 
 import frappe
+from frappe.utils import cstr
+
+from senaerp_platform.registry.vector_index import META_FIELDS, encode_int8, get_index, normalize, rerank
 
 
 SEARCH_FIELDS = [
@@ -29,7 +33,7 @@ def build_search_text(doc):
 	return ". ".join(parts)
 
 
-def get_embedding(text):
+def get_embedding(text, model=None):
 	"""Generate embedding vector using OpenAI-compatible API.
 
 	Checks in order:
@@ -37,8 +41,52 @@ def get_embedding(text):
 	  2. site_config embedding_api_key
 	Returns None if no API key is configured.
 	"""
+	embeddings = get_embeddings([text], model=model)
+	return embeddings[0] if embeddings else None
+
+
+# Query embeddings are cached per model, so repeated searches skip the API call
+_QUERY_EMBEDDING_TTL = 24 * 3600
+
+
+def get_query_embedding(query, model):
+	"""Embedding of a search query, cached in Redis per model and query text."""
+	digest = hashlib.sha1(" ".join(query.split()).encode()).hexdigest()
+	key = f"registry_query_embedding:{model}:{digest}"
+	embedding = frappe.cache.get_value(key)
+	if embedding is None:
+		embedding = get_embedding(query, model=model)
+		if embedding is not None:
+			frappe.cache.set_value(key, embedding, expires_in_sec=_QUERY_EMBEDDING_TTL)
+	return embedding
+
+
+# db global naming the model the stored ``_embedding`` vectors were built with
+_ACTIVE_MODEL_KEY = "registry_embedding_model"
+
+
+def configured_model():
+	"""The embedding model requested by env / site config."""
+	return (
+		os.environ.get("EMBEDDING_MODEL")
+		or frappe.conf.get("embedding_model")
+		or "text-embedding-3-small"
+	)
+
+
+def active_model():
+	"""The model behind the live index. Differs from configured_model() while a migration runs."""
+	return frappe.db.get_global(_ACTIVE_MODEL_KEY) or configured_model()
+
+
+def get_embeddings(texts, model=None):
+	"""Generate embedding vectors for a list of texts in a single API call.
+
+	``model`` defaults to configured_model(). Returns a list of vectors in
+	input order, or None if no API key is configured or the request failed.
+	"""
 	api_key = os.environ.get("OPENAI_API_KEY") or frappe.conf.get("embedding_api_key")
-	if not api_key:
+	if not api_key or not texts:
 		return None
 
 	base_url = (
@@ -46,14 +94,10 @@ def get_embedding(text):
 		or frappe.conf.get("embedding_base_url")
 		or "https://api.openai.com/v1"
 	)
-	model = (
-		os.environ.get("EMBEDDING_MODEL")
-		or frappe.conf.get("embedding_model")
-		or "text-embedding-3-small"
-	)
+	model = model or configured_model()
 
 	url = f"{base_url.rstrip('/')}/embeddings"
-	payload = json.dumps({"input": text, "model": model}).encode()
+	payload = json.dumps({"input": list(texts), "model": model}).encode()
 	req = urllib.request.Request(
 		url,
 		data=payload,
@@ -66,7 +110,8 @@ def get_embedding(text):
 	try:
 		with urllib.request.urlopen(req, timeout=30) as resp:
 			data = json.loads(resp.read())
-			return data["data"][0]["embedding"]
+			rows = sorted(data["data"], key=lambda d: d.get("index", 0))
+			return [row["embedding"] for row in rows]
 	except (urllib.error.URLError, KeyError, IndexError) as e:
 		frappe.log_error(f"Embedding API error: {e}", "Registry Embedding")
 		return None
@@ -84,49 +129,97 @@ def cosine_similarity(a, b):
 _SIMILARITY_THRESHOLD = 0.30
 
 
+# With int8 indexes, fetch this many candidates per result for exact re-ranking,
+# scanning slightly below the threshold to absorb quantization error
+_RERANK_CANDIDATES = 4
+_QUANTIZATION_MARGIN = 0.02
+# Passages scanned per requested result (several chunks may belong to one item)
+_PASSAGE_CANDIDATES = 5
+
+
 def semantic_search(query, filters=None, limit=20):
 	"""Search registry items by embedding similarity.
 
+	Items are scored by their own vector and by their best matching passage
+	of long text (see registry.passages), whichever is higher. Passage
+	scores are approximate and count less the int8 quantization margin.
+
 	Returns list of items sorted by relevance, or None if embeddings
 	are unavailable or no items exceed the similarity threshold.
 	"""
-	query_embedding = get_embedding(query)
+	from senaerp_platform.registry.explain import note_fallback, record_scores, search_stage
+	from senaerp_platform.registry.passages import passage_scores
+
+	with search_stage("embed_query"):
+		query_embedding = get_query_embedding(query, active_model())
 	if query_embedding is None:
+		note_fallback("semantic", "no query embedding (embeddings API not configured or failed)")
 		return None  # Caller should fall back to fulltext
+	query_vector = normalize(query_embedding)
+	if query_vector is None:
+		note_fallback("semantic", "query embedding is a zero vector")
+		return None
 
-	# Load items with embeddings
-	db_filters = dict(filters or {})
-	db_filters["_embedding"] = ("is", "set")
-
-	items = frappe.get_all(
-		"Registry",
-		filters=db_filters,
-		fields=SEARCH_FIELDS + ["_embedding"],
-		limit_page_length=0,
-	)
-
-	scored = []
-	for item in items:
-		if not item.get("_embedding"):
-			continue
-		try:
-			emb = json.loads(item["_embedding"])
-		except (json.JSONDecodeError, TypeError):
-			continue
-		score = cosine_similarity(query_embedding, emb)
-		if score >= _SIMILARITY_THRESHOLD:
-			item["_score"] = score
-			del item["_embedding"]
-			scored.append(item)
-
-	if not scored:
+	filters = dict(filters or {})
+	with search_stage("load_index"):
+		index = get_index()
+	where = _meta_predicate(filters)
+	if index.quantized:
+		with search_stage("vector_scan"):
+			candidates = index.nearest(
+				query_vector,
+				limit * _RERANK_CANDIDATES,
+				min_score=_SIMILARITY_THRESHOLD - _QUANTIZATION_MARGIN,
+				where=where,
+			)
+		with search_stage("rerank"):
+			hits = rerank(query_vector, candidates, min_score=_SIMILARITY_THRESHOLD)[:limit]
+	else:
+		with search_stage("vector_scan"):
+			hits = index.nearest(query_vector, limit, min_score=_SIMILARITY_THRESHOLD, where=where)
+
+	scores = dict(hits)
+	with search_stage("passage_scan"):
+		passages = passage_scores(
+			query_vector,
+			limit * _PASSAGE_CANDIDATES,
+			min_score=_SIMILARITY_THRESHOLD + _QUANTIZATION_MARGIN,
+			where=where,
+		)
+	record_scores(item_scores=scores, passage_scores=passages)
+	# Passages only have int8 codes, so their scores are approximate while item
+	# scores are exact. Count a passage at its lower bound so quantization error
+	# never lifts it over an exact score it does not really beat.
+	for name, score in passages.items():
+		score -= _QUANTIZATION_MARGIN
+		if score > scores.get(name, 0.0):
+			scores[name] = score
+	hits = sorted(scores.items(), key=lambda hit: hit[1], reverse=True)[:limit]
+
+	if not hits:
+		note_fallback("semantic", f"no item or passage scored at least {_SIMILARITY_THRESHOLD}")
 		return None  # Fall through to fulltext
 
-	scored.sort(key=lambda x: x["_score"], reverse=True)
-	result = scored[:limit]
-	for item in result:
-		item.pop("_score", None)
-	return result
+	# Filters are re-applied here for any the index metadata does not cover
+	with search_stage("hydrate"):
+		rows = frappe.get_all(
+			"Registry",
+			filters={**filters, "name": ("in", [name for name, _ in hits])},
+			fields=SEARCH_FIELDS,
+		)
+	by_name = {r.name: r for r in rows}
+	results = [by_name[name] for name, _ in hits if name in by_name]
+	if not results:
+		note_fallback("semantic", "no hit passed the filters")
+	return results or None
+
+
+def _meta_predicate(filters):
+	"""Pre-filter on the index metadata for the filter fields it carries."""
+	checks = [(f, cstr(v)) for f, v in filters.items() if f in META_FIELDS]
+	if not checks:
+		return None
+	return lambda meta: all(cstr(meta.get(f)) == v for f, v in checks)
 
 
 def fulltext_search(query, filters=None, order_by="", limit=20, offset=0):
@@ -169,24 +262,84 @@ def fulltext_search(query, filters=None, order_by="", limit=20, offset=0):
 
 
 def update_embedding(registry_name):
-	"""Generate and store embedding for a single registry item."""
-	doc = frappe.get_doc("Registry", registry_name)
-	search_text = build_search_text(doc)
-	doc.db_set("_search_text", search_text, update_modified=False)
+	"""Generate and store embedding for a single registry item; see ``update_embeddings``."""
+	return bool(update_embeddings([registry_name]))
+
 
-	embedding = get_embedding(search_text)
-	if embedding:
-		doc.db_set("_embedding", json.dumps(embedding), update_modified=False)
-	return bool(embedding)
+# Texts per embeddings API call in batch updates
+_EMBEDDING_BATCH_SIZE = 100
+
+
+def update_embeddings(registry_names):
+	"""Generate and store search text and embeddings for many registry items.
+
+	Embeddings are requested in batches of _EMBEDDING_BATCH_SIZE texts, with
+	the active model; while a model migration runs, the shadow vectors are
+	written too. Passages of long text fields are brought up to date, and the
+	neighbour lists and duplicate flags affected by the new vectors are
+	refreshed afterwards. Returns the number of items that
+	received an embedding.
+	"""
+	from senaerp_platform.registry.duplicates import update_duplicate_flags
+	from senaerp_platform.registry.neighbours import refresh_neighbours
+	from senaerp_platform.registry.passages import update_passages
+	from senaerp_platform.registry.vector_index import invalidate_index
+
+	model = active_model()
+	target = configured_model()
+	embedded = []
+	for i in range(0, len(registry_names), _EMBEDDING_BATCH_SIZE):
+		docs = [frappe.get_doc("Registry", name) for name in registry_names[i : i + _EMBEDDING_BATCH_SIZE]]
+		texts = [build_search_text(doc) for doc in docs]
+		for doc, text in zip(docs, texts):
+			doc.db_set("_search_text", text, update_modified=False)
+
+		if target != model:
+			write_shadow_embeddings([doc.name for doc in docs], texts, target)
+
+		embeddings = get_embeddings(texts, model=model)
+		if not embeddings:
+			continue
+		for doc, embedding in zip(docs, embeddings):
+			doc.db_set(_embedding_values(embedding, model), update_modified=False)
+			embedded.append(doc.name)
+
+	update_passages(registry_names)
+	if embedded:
+		if not frappe.db.get_global(_ACTIVE_MODEL_KEY):
+			frappe.db.set_global(_ACTIVE_MODEL_KEY, model)
+		invalidate_index()
+		update_duplicate_flags(refresh_neighbours(embedded))
+	return len(embedded)
+
+
+def write_shadow_embeddings(registry_names, texts, model):
+	"""Embed ``texts`` with ``model`` into the shadow columns. Returns the names written."""
+	embeddings = get_embeddings(texts, model=model)
+	if not embeddings:
+		return []
+	for name, embedding in zip(registry_names, embeddings):
+		frappe.db.set_value(
+			"Registry",
+			name,
+			_embedding_values(embedding, model, prefix="_shadow"),
+			update_modified=False,
+		)
+	return list(registry_names)
+
+
+def _embedding_values(embedding, model, prefix=""):
+	return {
+		f"{prefix}_embedding": json.dumps(embedding),
+		f"{prefix}_embedding_int8": encode_int8(embedding),
+		f"{prefix}_embedding_model": model,
+	}
 
 
 @frappe.whitelist()
 def rebuild_search_index():
 	"""Rebuild search text and embeddings for all registry items."""
 	items = frappe.get_all("Registry", pluck="name")
-	success = 0
-	for name in items:
-		if update_embedding(name):
-			success += 1
+	success = update_embeddings(items)
 	frappe.db.commit()
 	return {"total": len(items), "embedded": success}
@@ -0,0 +1,158 @@
+"""Explain mode for registry search.
+
+``registry.api.search(..., explain=1)`` (System Managers only) runs the
+search uncached with a trace attached to ``frappe.local`` and returns, next
+to the results:
+
+- ``path``: the strategy that answered, and ``fallbacks``: why earlier
+  strategies did not;
+- ``timings_ms``: wall time per stage (query embedding, vector and passage
+  scans, re-ranking, SQL stages);
+- per item: semantic item and passage scores, and the FULLTEXT relevance;
+- ``queries``: every SQL statement executed, with its duration and the
+  output of ``EXPLAIN``.
+
+Search code reports into the trace through ``search_stage``,
+``record_scores`` and ``note_fallback``, which do nothing outside explain
+mode. SQL is captured by wrapping ``frappe.db.sql`` for the duration of the
+explained search only.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+import frappe
+
+_MAX_EXPLAINED_QUERIES = 50
+
+
+class SearchTrace:
+	def __init__(self):
+		self.timings: dict[str, float] = {}
+		self.item_scores: dict[str, float] = {}
+		self.passage_scores: dict[str, float] = {}
+		self.fallbacks: list[dict] = []
+		self.queries: list[dict] = []
+
+
+def current_trace() -> SearchTrace | None:
+	return getattr(frappe.local, "registry_search_trace", None)
+
+
+@contextmanager
+def search_stage(name: str):
+	"""Time a search stage when explaining; a no-op otherwise."""
+	trace = current_trace()
+	if trace is None:
+		yield
+		return
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		trace.timings[name] = trace.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def record_scores(item_scores=None, passage_scores=None) -> None:
+	trace = current_trace()
+	if trace is not None:
+		trace.item_scores.update(item_scores or {})
+		trace.passage_scores.update(passage_scores or {})
+
+
+def note_fallback(path: str, reason: str) -> None:
+	trace = current_trace()
+	if trace is not None:
+		trace.fallbacks.append({"path": path, "reason": reason})
+
+
+def explain_search(q, tags, filters, order_fields, limit, offset) -> dict:
+	"""Run a search with tracing and return results plus the explanation."""
+	from senaerp_platform.registry.api import _attach_tags, _search
+
+	with _tracing() as trace:
+		start = time.perf_counter()
+		items, total, path = _search(q, tags, filters, order_fields, limit, offset)
+		trace.timings["total"] = (time.perf_counter() - start) * 1000
+
+	names = [item.get("name") for item in items]
+	lexical = _lexical_scores(q, names, trace) if q else {}
+	items = _attach_tags(items)
+	for name, item in zip(names, items):
+		item["scores"] = {
+			"semantic": trace.item_scores.get(name),
+			"passage": trace.passage_scores.get(name),
+			"lexical": lexical.get(name),
+		}
+
+	return {
+		"items": items,
+		"total": total,
+		"limit": limit,
+		"offset": offset,
+		"explain": {
+			"path": path,
+			"fallbacks": trace.fallbacks,
+			"timings_ms": {stage: round(ms, 2) for stage, ms in trace.timings.items()},
+			"queries": [_explain_query(query) for query in trace.queries[:_MAX_EXPLAINED_QUERIES]],
+			"queries_executed": len(trace.queries),
+		},
+	}
+
+
+@contextmanager
+def _tracing():
+	trace = SearchTrace()
+	original_sql = frappe.db.sql
+
+	def traced_sql(query, values=(), *args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return original_sql(query, values, *args, **kwargs)
+		finally:
+			trace.queries.append({
+				"query": str(query).strip(),
+				"values": values,
+				"ms": round((time.perf_counter() - start) * 1000, 2),
+			})
+
+	frappe.local.registry_search_trace = trace
+	frappe.db.sql = traced_sql
+	try:
+		yield trace
+	finally:
+		frappe.db.sql = original_sql
+		frappe.local.registry_search_trace = None
+
+
+def _explain_query(query: dict) -> dict:
+	if not query["query"].upper().startswith("SELECT"):
+		return query
+	try:
+		plan = frappe.db.sql(f"EXPLAIN {query['query']}", query["values"], as_dict=True)
+	except Exception as e:
+		plan = str(e)
+	return {**query, "explain": plan}
+
+
+def _lexical_scores(q: str, names: list[str], trace: SearchTrace) -> dict[str, float]:
+	"""FULLTEXT relevance of ``q`` for the given items, as the fulltext fallback would rank them.
+
+	Runs after tracing has ended, so it is not listed in ``queries``. Empty,
+	with a note in ``trace``, when the query fails, e.g. on a site without the
+	FULLTEXT index.
+	"""
+	names = [n for n in names if n]
+	if not names:
+		return {}
+	try:
+		return dict(frappe.db.sql(
+			"""SELECT `name`, MATCH(`_search_text`) AGAINST (%(q)s IN NATURAL LANGUAGE MODE)
+			FROM `tabRegistry` WHERE `name` IN %(names)s""",
+			{"q": q, "names": tuple(names)},
+		))
+	except Exception as e:
+		trace.fallbacks.append({"path": "lexical_scores", "reason": str(e)})
+		return {}
@@ -0,0 +1,36 @@
+import frappe
+from frappe.model.document import Document
+
+
+class RegistryExtension(Document):
+	"""Base controller for the per-item_type extension DocTypes (Registry Agent, Registry Tool, ...)."""
+
+	def validate(self):
+		self.validate_no_cycles()
+
+	def on_update(self):
+		self.refresh_registry_hash()
+		self.log_registry_change()
+		self.update_passages()
+
+	def validate_no_cycles(self):
+		from senaerp_platform.registry.cycles import validate_no_cycles
+		validate_no_cycles(self)
+
+	def refresh_registry_hash(self):
+		if not self.registry:
+			return
+		from senaerp_platform.registry.content_hash import update_content_hash
+		update_content_hash(self.registry)
+
+	def log_registry_change(self):
+		if not self.registry:
+			return
+		from senaerp_platform.registry.changes import queue_change
+		queue_change(self.registry)
+
+	def update_passages(self):
+		from senaerp_platform.registry.passages import PASSAGE_SOURCES, enqueue_passage_update
+		fields = PASSAGE_SOURCES.get(self.doctype, [])
+		if self.registry and any(self.has_value_changed(f) for f in fields):
+			enqueue_passage_update(self.registry)
@@ -6,9 +6,14 @@ UIs, logic packs, and roles — all traversable in the registry UI.
 """
 from __future__ import annotations
 
+import random
+
 import frappe
+from frappe.utils import cint
 
-from senaerp_platform.registry.seed import ALL_FLAG_NAMES
+from senaerp_platform.registry.bulk_import import import_rows
+from senaerp_platform.registry.content_hash import update_content_hash
+from senaerp_platform.registry.snapshot import clear_registry_tables
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -608,6 +613,19 @@ _ROLE_FLAGS = {
 	},
 }
 
+# Profile flag -> Agent Template Check field, for the flags the template has an
+# equivalent of; the other template fields keep their defaults
+_ROLE_FLAG_FIELDS = {
+	"injectable": "injectable",
+	"spawnable": "can_be_created_ephemeral",
+	"visible_in_agent_list": "visible_in_agent_list",
+	"single_user_instance": "single_user_instance",
+	"woken_by_text": "trigger_comms_inbox",
+	"woken_by_direct_mention": "trigger_comms_mention_direct",
+	"woken_by_all_mention": "trigger_comms_mention_all",
+	"woken_by_any_townhall": "trigger_comms_townhall_any",
+}
+
 # Team Type wiring: roles with permission profiles
 _TEAM_TYPE_EXT = {
 	"Standard": {
@@ -731,23 +749,7 @@ _CLUSTER_EXT = {
 
 def _cleanup_all():
 	"""Remove all registry items and extensions."""
-	# Child tables first
-	for dt in [
-		"Registry Tag", "Registry Agent Tool", "Registry Agent Skill",
-		"Registry Team Member", "Registry Cluster Team", "Registry Team Template Role Config",
-	]:
-		frappe.db.sql(f"DELETE FROM `tab{dt}`")
-
-	# Extension tables
-	for dt in [
-		"Registry Agent", "Registry Team", "Registry Cluster",
-		"Registry Team Template", "Registry Agent Template", "Registry UI",
-		"Registry Logic", "Registry Skill", "Registry Tool",
-	]:
-		frappe.db.sql(f"DELETE FROM `tab{dt}`")
-
-	# Registry items
-	frappe.db.sql("DELETE FROM `tabRegistry`")
+	clear_registry_tables()
 	frappe.db.commit()
 	print("Cleaned up all registry data")
 
@@ -820,8 +822,8 @@ def _wire_roles(ref_map):
 		if not ext_name:
 			continue
 		doc = frappe.get_doc("Registry Agent Template", ext_name)
-		for flag in ALL_FLAG_NAMES:
-			setattr(doc, flag, flags.get(flag, "deny"))
+		for flag, field in _ROLE_FLAG_FIELDS.items():
+			setattr(doc, field, 1 if flags.get(flag) == "allow" else 0)
 		doc.save(ignore_permissions=True)
 
 
@@ -932,11 +934,149 @@ def _wire_clusters(ref_map):
 		doc.save(ignore_permissions=True)
 
 
-def generate_dummy_data(clean=False):
+# ═══════════════════════════════════════════════════════════════════════════════
+# SYNTHETIC SCALE-OUT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Items per synthetic unit — roughly one more company the size of ITEMS
+_SYNTHETIC_UNIT = {"Tool": 32, "Skill": 15, "UI": 6, "Logic": 6, "Agent": 35, "Team": 12, "Cluster": 5}
+
+# (min, max) fan-out per parent
+_SYNTHETIC_FANOUT = {
+	"agent_tools": (2, 8),
+	"agent_skills": (1, 4),
+	"members": (2, 6),
+	"cluster_teams": (2, 4),
+}
+
+_SYNTHETIC_CATEGORIES = ["General", "Finance", "Sales", "Support", "HR", "Operations", "System"]
+_SYNTHETIC_TAGS = [
+	"automation", "reporting", "finance", "sales", "support", "hr", "operations",
+	"compliance", "analytics", "workflow", "customer", "documents", "escalation",
+]
+_SYNTHETIC_SKILL_TYPES = ["identity", "instructions", "operating_workflow", "domain", "tool_guide"]
+
+
+def _synthetic_unit(unit, rng, role_slugs, team_type_slugs):
+	"""Build install-package shaped rows for one synthetic unit."""
+	def slug(kind, i):
+		return f"synthetic-{unit}-{kind}-{i}"
+
+	def row(item_type, kind, i, extension):
+		return {
+			"item_type": item_type,
+			"title": f"Synthetic {item_type} {unit}.{i}",
+			"slug": slug(kind, i),
+			"description": f"Synthetic {item_type.lower()} #{i} of load-test unit {unit}",
+			"category": rng.choice(_SYNTHETIC_CATEGORIES),
+			"trust_status": "approved",
+			"author": "Sena",
+			"tags": rng.sample(_SYNTHETIC_TAGS, 3),
+			"extension": extension,
+		}
+
+	def pick(pool, fanout):
+		low, high = _SYNTHETIC_FANOUT[fanout]
+		return rng.sample(pool, min(len(pool), rng.randint(low, high)))
+
+	rows = []
+	tools = [slug("tool", i) for i in range(_SYNTHETIC_UNIT["Tool"])]
+	for i, tool in enumerate(tools):
+		rows.append(row("Tool", "tool", i, {
+			"tool_name": tool.replace("-", "_"),
+			"tool_class": "system",
+			"access_default": "allow",
+		}))
+
+	skills = [slug("skill", i) for i in range(_SYNTHETIC_UNIT["Skill"])]
+	for i in range(len(skills)):
+		rows.append(row("Skill", "skill", i, {
+			"skill_type": rng.choice(_SYNTHETIC_SKILL_TYPES),
+			"skill_content": f"Synthetic skill content {unit}.{i}",
+		}))
+
+	uis = [slug("ui", i) for i in range(_SYNTHETIC_UNIT["UI"])]
+	for i in range(len(uis)):
+		rows.append(row("UI", "ui", i, {"ui_mode": "chat", "framework": "vue"}))
+
+	logic = [slug("logic", i) for i in range(_SYNTHETIC_UNIT["Logic"])]
+	for i in range(len(logic)):
+		rows.append(row("Logic", "logic", i, {
+			"module_name": f"synthetic_{unit}_{i}",
+			"tier": rng.choice(["jr", "mid", "sr"]),
+		}))
+
+	agents = [slug("agent", i) for i in range(_SYNTHETIC_UNIT["Agent"])]
+	for i in range(len(agents)):
+		rows.append(row("Agent", "agent", i, {
+			"agent_role": rng.choice(list(role_slugs.values())),
+			"model": "claude-sonnet-4-5-20250929",
+			"ui": rng.choice(uis) if rng.random() < 0.3 else None,
+			"logic": rng.choice(logic) if rng.random() < 0.3 else None,
+			"agent_tools": [{"tool": t, "enabled": 1} for t in pick(tools, "agent_tools")],
+			"agent_skills": [
+				{"skill": s, "activation": rng.choice(["core", "on-demand"]), "enabled": 1}
+				for s in pick(skills, "agent_skills")
+			],
+		}))
+
+	teams = [slug("team", i) for i in range(_SYNTHETIC_UNIT["Team"])]
+	for i in range(len(teams)):
+		team_type = rng.choice(list(team_type_slugs))
+		roles = [r["role"] for r in _TEAM_TYPE_EXT.get(team_type, {}).get("roles", [])] or ["Default"]
+		rows.append(row("Team", "team", i, {
+			"team_type": team_type_slugs[team_type],
+			"members": [
+				{"agent": a, "role": role_slugs.get(rng.choice(roles), role_slugs.get("Default"))}
+				for a in pick(agents, "members")
+			],
+		}))
+
+	for i in range(_SYNTHETIC_UNIT["Cluster"]):
+		rows.append(row("Cluster", "cluster", i, {
+			"cluster_teams": [{"team": t} for t in pick(teams, "cluster_teams")],
+		}))
+
+	return rows
+
+
+def _generate_synthetic(units, seed=42):
+	"""Bulk-insert ``units`` synthetic copies of a company-sized registry graph.
+
+	Agents, teams and clusters link to the existing Agent/Team Templates.
+	Slugs are deterministic, so re-running upserts instead of duplicating.
+	"""
+	rng = random.Random(seed)
+	templates = frappe.get_all(
+		"Registry",
+		filters={"item_type": ("in", ["Agent Template", "Team Template"])},
+		fields=["title", "slug", "item_type"],
+	)
+	role_slugs = {t.title: t.slug for t in templates if t.item_type == "Agent Template"}
+	team_type_slugs = {t.title: t.slug for t in templates if t.item_type == "Team Template"}
+	if not role_slugs or not team_type_slugs:
+		frappe.throw("Agent and Team Templates must exist before generating synthetic data")
+
+	rows = []
+	for unit in range(1, units + 1):
+		rows += _synthetic_unit(unit, rng, role_slugs, team_type_slugs)
+
+	result = import_rows(rows)
+	print(
+		f"Synthetic: {units} units, {result['inserted']} inserted, "
+		f"{result['updated']} updated, {len(result['errors'])} errors"
+	)
+	return result
+
+
+def generate_dummy_data(clean=False, scale=1):
 	"""Generate realistic, interconnected registry items.
 
 	Args:
 		clean: If True, wipe all existing registry data first.
+		scale: Multiply the registry size. Values above 1 add ``scale - 1``
+			synthetic units of clusters, teams, agents, tools and skills with
+			the same fan-out as ITEMS, written with bulk inserts.
 	"""
 	if clean:
 		_cleanup_all()
@@ -991,6 +1131,15 @@ def generate_dummy_data(clean=False):
 	_wire_clusters(ref_map)
 	print("  Clusters wired (teams)")
 
+	# Wiring writes bypass document hooks, so refresh content hashes explicitly
+	for name in frappe.get_all("Registry", pluck="name"):
+		update_content_hash(name)
+	print("  Content hashes refreshed")
+
 	frappe.db.commit()
 	print(f"Done: {created} items created, all extensions wired")
-	return {"created": created}
+
+	synthetic = None
+	if cint(scale) > 1:
+		synthetic = _generate_synthetic(cint(scale) - 1)
+	return {"created": created, "synthetic": synthetic}
@@ -0,0 +1,114 @@
+"""Buffered install counters and trending scores.
+
+Install events only increment a Redis hash (``slug -> count``). A scheduled
+job drains the hash and applies the counts to Registry with batched UPDATEs,
+so installs never contend on Registry rows.
+
+``trending_score`` is an exponentially decayed install count kept in log2
+space relative to a fixed epoch::
+
+	trending_score = log2(sum(installs * 2 ** ((t - TRENDING_EPOCH) / TRENDING_HALF_LIFE)))
+
+Ordering by it equals ordering by the decayed count at any point in time,
+while only rows that received installs need to be rewritten on each flush.
+"""
+
+from __future__ import annotations
+
+import math
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+_COUNTER_KEY = "registry_install_counts"
+_FLUSH_BATCH_SIZE = 500
+
+TRENDING_EPOCH = get_datetime("2026-01-01 00:00:00")
+TRENDING_HALF_LIFE = 7 * 24 * 3600  # seconds
+
+
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def record_install(slug: str | None = None):
+	"""Count one install of an approved registry item."""
+	from senaerp_platform.registry.api import _get_installable
+
+	_get_installable(slug)
+	frappe.cache.hincrby(frappe.cache.make_key(_COUNTER_KEY), slug, 1)
+	return {"ok": True}
+
+
+def flush_install_counts() -> int:
+	"""Apply buffered install counts to Registry. Returns the number of items updated."""
+	counts = _drain_counts()
+	if not counts:
+		return 0
+
+	try:
+		slugs = list(counts)
+		for i in range(0, len(slugs), _FLUSH_BATCH_SIZE):
+			_apply_counts({s: counts[s] for s in slugs[i : i + _FLUSH_BATCH_SIZE]})
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		_restore_counts(counts)
+		raise
+
+	return len(counts)
+
+
+def trending_increment(count: int, at=None) -> float:
+	"""log2 weight of ``count`` installs happening at ``at`` (default: now)."""
+	elapsed = (get_datetime(at or now_datetime()) - TRENDING_EPOCH).total_seconds()
+	return math.log2(count) + elapsed / TRENDING_HALF_LIFE
+
+
+def _drain_counts() -> dict[str, int]:
+	"""Atomically read and clear the Redis counter hash."""
+	key = frappe.cache.make_key(_COUNTER_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.hgetall(key)
+	pipe.delete(key)
+	raw, _ = pipe.execute()
+	counts = {}
+	for slug, count in (raw or {}).items():
+		count = int(count)
+		if count > 0:
+			counts[frappe.safe_decode(slug)] = count
+	return counts
+
+
+def _restore_counts(counts: dict[str, int]) -> None:
+	key = frappe.cache.make_key(_COUNTER_KEY)
+	pipe = frappe.cache.pipeline()
+	for slug, count in counts.items():
+		pipe.hincrby(key, slug, count)
+	pipe.execute()
+
+
+def _apply_counts(counts: dict[str, int]) -> None:
+	"""One UPDATE for a batch of slugs: bump install_count and merge the trending weight."""
+	values = {}
+	count_cases = []
+	score_cases = []
+	for i, (slug, count) in enumerate(counts.items()):
+		values[f"s{i}"] = slug
+		values[f"c{i}"] = count
+		values[f"w{i}"] = trending_increment(count)
+		count_cases.append(f"WHEN %(s{i})s THEN %(c{i})s")
+		score_cases.append(f"WHEN %(s{i})s THEN %(w{i})s")
+
+	weight = f"CASE `slug` {' '.join(score_cases)} END"
+	# log2(2^a + 2^b) = max(a, b) + log2(1 + 2^-|a - b|), so scores never overflow
+	frappe.db.sql(
+		f"""
+		UPDATE `tabRegistry`
+		SET `install_count` = IFNULL(`install_count`, 0) + CASE `slug` {" ".join(count_cases)} END,
+			`trending_score` = IF(
+				IFNULL(`trending_score`, 0) = 0,
+				{weight},
+				GREATEST(`trending_score`, {weight}) + LOG2(1 + POW(2, -ABS(`trending_score` - {weight})))
+			)
+		WHERE `slug` IN ({", ".join(f"%(s{i})s" for i in range(len(counts)))})
+		""",
+		values,
+	)
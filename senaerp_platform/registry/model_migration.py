@@ -0,0 +1,122 @@
+"""Zero-downtime embedding model migration.
+
+Every stored vector is tagged with the model that produced it, and the db
+global ``registry_embedding_model`` names the model behind the live index.
+When site config asks for a different ``embedding_model``:
+
+1. ``migrate_embedding_model`` re-embeds all items with the new model into
+   the ``_shadow_embedding*`` columns, one committed batch at a time, so the
+   job can be interrupted and resumed. New saves write both vectors.
+2. Search keeps using the live vectors, and embeds queries with the active
+   model, until every item has a shadow vector.
+3. One UPDATE then moves the shadow vectors into place and the active model
+   is switched in the same transaction. Workers reload their index once it
+   commits, and neighbour lists are rebuilt from the new vectors. Passage
+   embeddings are re-embedded afterwards in a follow-up job.
+"""
+
+from __future__ import annotations
+
+import frappe
+
+from senaerp_platform.registry.embedding import (
+	_ACTIVE_MODEL_KEY,
+	_EMBEDDING_BATCH_SIZE,
+	active_model,
+	configured_model,
+	write_shadow_embeddings,
+)
+
+_JOB_ID = "registry_embedding_model_migration"
+
+
+def check_embedding_model() -> None:
+	"""Queue a migration if site config names a different model than the live index."""
+	if configured_model() != active_model():
+		frappe.enqueue(
+			"senaerp_platform.registry.model_migration.migrate_embedding_model",
+			queue="long",
+			timeout=6 * 3600,
+			job_id=_JOB_ID,
+			deduplicate=True,
+		)
+
+
+@frappe.whitelist()
+def embedding_model_status() -> dict:
+	frappe.only_for("System Manager")
+	target = configured_model()
+	active = active_model()
+	return {
+		"active": active,
+		"target": target,
+		"migrating": target != active,
+		"remaining": len(_pending_items(target)) if target != active else 0,
+	}
+
+
+def migrate_embedding_model() -> dict:
+	"""Fill the shadow index for the configured model, then swap it in if complete."""
+	target = configured_model()
+	if target == active_model():
+		return {"swapped": False, "remaining": 0}
+
+	pending = _pending_items(target)
+	for i in range(0, len(pending), _EMBEDDING_BATCH_SIZE):
+		batch = pending[i : i + _EMBEDDING_BATCH_SIZE]
+		write_shadow_embeddings([r.name for r in batch], [r._search_text for r in batch], target)
+		frappe.db.commit()
+
+	remaining = len(_pending_items(target))
+	if remaining:
+		# Embedding API failures; the next scheduled check resumes from here
+		return {"swapped": False, "remaining": remaining}
+
+	swap_embedding_model(target)
+	return {"swapped": True, "remaining": 0}
+
+
+def swap_embedding_model(model: str) -> None:
+	"""Atomically promote the shadow vectors of ``model`` to the live index."""
+	from senaerp_platform.registry.duplicates import update_duplicate_flags
+	from senaerp_platform.registry.neighbours import rebuild_neighbours
+	from senaerp_platform.registry.passages import invalidate_passage_index
+	from senaerp_platform.registry.vector_index import invalidate_index
+
+	# Assignments run left to right, so shadow values are read before being cleared
+	frappe.db.sql(
+		"""UPDATE `tabRegistry`
+		SET `_embedding` = `_shadow_embedding`,
+			`_embedding_int8` = `_shadow_embedding_int8`,
+			`_embedding_model` = `_shadow_embedding_model`,
+			`_shadow_embedding` = NULL,
+			`_shadow_embedding_int8` = NULL,
+			`_shadow_embedding_model` = NULL
+		WHERE `_shadow_embedding_model` = %(model)s""",
+		{"model": model},
+	)
+	frappe.db.set_global(_ACTIVE_MODEL_KEY, model)
+	invalidate_index()
+	invalidate_passage_index()
+	frappe.db.commit()
+
+	update_duplicate_flags(rebuild_neighbours())
+	frappe.db.commit()
+
+	# Passages built with the old model drop out of search until re-embedded
+	frappe.enqueue("senaerp_platform.registry.passages.refresh_all_passages", queue="long", timeout=6 * 3600)
+
+
+def _pending_items(model: str) -> list:
+	"""Items with search text but no shadow vector for ``model`` yet."""
+	return frappe.get_all(
+		"Registry",
+		filters={"_search_text": ("is", "set")},
+		or_filters=[
+			["_shadow_embedding_model", "is", "not set"],
+			["_shadow_embedding_model", "!=", model],
+		],
+		fields=["name", "_search_text"],
+		order_by="name asc",
+		limit_page_length=0,
+	)
@@ -0,0 +1,114 @@
+"""Bulk moderation of registry submissions.
+
+Approving items one save at a time runs the full Registry controller for
+each of them. ``moderate`` instead sets ``trust_status`` for a whole list
+with one UPDATE in one transaction. Every follow-up happens once for the set:
+
+- duplicate flags are recomputed for the items and their neighbours;
+- the vector and passage indexes are invalidated, since they filter on
+  ``trust_status``;
+- the items enter the change feed together, so the registry version bumps
+  once and a single catalog snapshot refresh is queued on commit;
+- one background job embeds the newly approved items that have no vector
+  for the active model yet.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import cint
+
+from senaerp_platform.registry.embedding import active_model
+
+ACTIONS = {"approve": "approved", "reject": "blocked"}
+
+_MAX_MODERATION_ITEMS = 1000
+
+
+@frappe.whitelist()
+def get_queue(limit=50, offset=0) -> list[dict]:
+	"""Unreviewed submissions, oldest first, with their possible duplicate."""
+	frappe.only_for("System Manager")
+	return frappe.db.sql(
+		"""
+		SELECT r.slug, r.title, r.item_type, r.author, r.creation,
+			d.slug AS duplicate_slug, r.duplicate_score
+		FROM `tabRegistry` r
+		LEFT JOIN `tabRegistry` d ON d.name = r.duplicate_of
+		WHERE r.trust_status = 'unreviewed'
+		ORDER BY r.creation ASC
+		LIMIT %(limit)s OFFSET %(offset)s
+		""",
+		{"limit": min(cint(limit) or 50, _MAX_MODERATION_ITEMS), "offset": cint(offset)},
+		as_dict=True,
+	)
+
+
+@frappe.whitelist(methods=["POST"])
+def moderate(slugs=None, action=None) -> dict:
+	"""Approve or reject a list of registry items in one transaction.
+
+	``action`` is ``approve`` or ``reject`` (sets ``blocked``). Items that
+	already have the target status are left alone.
+	"""
+	frappe.only_for("System Manager")
+	if action not in ACTIONS:
+		frappe.throw(f"action must be one of: {', '.join(ACTIONS)}")
+	slugs = frappe.parse_json(slugs) if isinstance(slugs, str) else slugs
+	if not slugs:
+		frappe.throw("slugs is required", frappe.MandatoryError)
+	if len(slugs) > _MAX_MODERATION_ITEMS:
+		frappe.throw(f"At most {_MAX_MODERATION_ITEMS} items per call")
+
+	status = ACTIONS[action]
+	rows = frappe.get_all(
+		"Registry",
+		filters={"slug": ("in", list(set(slugs)))},
+		fields=["name", "slug", "trust_status", "_embedding_model"],
+	)
+	changed = [r for r in rows if r.trust_status != status]
+	if changed:
+		set_trust_status([r.name for r in changed], status)
+
+	if status == "approved":
+		model = active_model()
+		_enqueue_embeddings([r.name for r in changed if r._embedding_model != model])
+
+	found = {r.slug for r in rows}
+	return {
+		"updated": [r.slug for r in changed],
+		"unchanged": [r.slug for r in rows if r.trust_status == status],
+		"missing": [s for s in slugs if s not in found],
+	}
+
+
+def set_trust_status(registry_names: list[str], status: str) -> None:
+	"""Set ``trust_status`` on many items and queue their follow-up work, without committing."""
+	from senaerp_platform.registry.changes import queue_changes
+	from senaerp_platform.registry.duplicates import update_duplicate_flags
+	from senaerp_platform.registry.passages import invalidate_passage_index
+	from senaerp_platform.registry.vector_index import invalidate_index
+
+	frappe.db.set_value("Registry", {"name": ("in", registry_names)}, "trust_status", status)
+
+	# Same as Registry.refresh_duplicate_flags, for the whole set at once
+	referrers = frappe.get_all(
+		"Registry Neighbour", filters={"neighbour": ("in", registry_names)}, pluck="registry"
+	)
+	update_duplicate_flags(list({*registry_names, *referrers}))
+
+	invalidate_index()
+	invalidate_passage_index()
+	queue_changes(registry_names)
+
+
+def _enqueue_embeddings(registry_names: list[str]) -> None:
+	if not registry_names:
+		return
+	frappe.enqueue(
+		"senaerp_platform.registry.embedding.update_embeddings",
+		queue="long",
+		timeout=3600,
+		enqueue_after_commit=True,
+		registry_names=registry_names,
+	)
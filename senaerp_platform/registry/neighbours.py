@@ -0,0 +1,121 @@
+"""Precomputed "similar items" for every registry entry.
+
+The top ``NEIGHBOUR_COUNT`` most similar items of each embedded item are
+stored as ``Registry Neighbour`` rows whenever embeddings are written, so
+``registry.api.similar`` is a single indexed query.
+
+Refreshes are incremental: besides the re-embedded items themselves, only
+items whose stored list contains one of them, or that one of them now beats,
+are recomputed.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import now
+
+from senaerp_platform.registry.vector_index import get_index
+
+NEIGHBOUR_COUNT = 20
+MIN_NEIGHBOUR_SCORE = 0.30
+
+
+def refresh_neighbours(registry_names) -> list[str]:
+	"""Recompute neighbour lists affected by new vectors for ``registry_names``.
+
+	Returns the names of items whose lists were rewritten.
+	"""
+	index = get_index(quantized=False)
+	changed = [n for n in registry_names if n in index.position]
+	if not changed:
+		return []
+
+	affected = set(changed) | _lists_containing(changed)
+	affected.intersection_update(index.position)
+
+	# Items a changed vector would now enter: compare against each list's weakest
+	# score. Not needed when every list is rebuilt anyway.
+	if len(affected) < len(index):
+		candidates: dict[str, float] = {}
+		for name in changed:
+			for i, score in enumerate(index.scores(index.vector(name))):
+				other = index.names[i]
+				if other != name and other not in affected and score >= MIN_NEIGHBOUR_SCORE:
+					candidates[other] = max(score, candidates.get(other, score))
+		floors = _list_floors(list(candidates))
+		for other, score in candidates.items():
+			floor, size = floors.get(other, (MIN_NEIGHBOUR_SCORE, 0))
+			if size < NEIGHBOUR_COUNT or score > floor:
+				affected.add(other)
+
+	rows = []
+	for name in affected:
+		nearest = index.nearest(
+			index.vector(name), NEIGHBOUR_COUNT, min_score=MIN_NEIGHBOUR_SCORE, exclude={name}
+		)
+		rows.extend((name, other, score, position) for position, (other, score) in enumerate(nearest, 1))
+
+	affected = list(affected)
+	_write_lists(affected, rows)
+	return affected
+
+
+def rebuild_neighbours() -> list[str]:
+	"""Recompute every neighbour list from scratch."""
+	frappe.db.delete("Registry Neighbour")
+	return refresh_neighbours(get_index(quantized=False).names)
+
+
+def enqueue_rebuild() -> None:
+	frappe.enqueue(
+		"senaerp_platform.registry.neighbours.rebuild_neighbours",
+		queue="long",
+		timeout=6 * 3600,
+		job_id="rebuild_registry_neighbours",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def delete_neighbours(registry_name: str) -> None:
+	"""Remove an item's list and its appearances in other items' lists."""
+	frappe.db.delete("Registry Neighbour", {"registry": registry_name})
+	frappe.db.delete("Registry Neighbour", {"neighbour": registry_name})
+
+
+def _lists_containing(registry_names: list[str]) -> set[str]:
+	"""Items whose stored list includes any of ``registry_names``."""
+	return set(frappe.get_all(
+		"Registry Neighbour",
+		filters={"neighbour": ("in", registry_names)},
+		pluck="registry",
+		distinct=True,
+	))
+
+
+def _list_floors(registry_names: list[str]) -> dict[str, tuple[float, int]]:
+	"""{registry: (weakest stored score, list length)} for the given items, in one query."""
+	if not registry_names:
+		return {}
+	return {
+		registry: (floor, size)
+		for registry, floor, size in frappe.db.sql(
+			"""SELECT `registry`, MIN(`score`), COUNT(*) FROM `tabRegistry Neighbour`
+			WHERE `registry` IN %(names)s GROUP BY `registry`""",
+			{"names": tuple(registry_names)},
+		)
+	}
+
+
+def _write_lists(registry_names: list[str], rows: list[tuple]) -> None:
+	if registry_names:
+		frappe.db.delete("Registry Neighbour", {"registry": ("in", registry_names)})
+	if not rows:
+		return
+	timestamp = now()
+	user = frappe.session.user
+	frappe.db.bulk_insert(
+		"Registry Neighbour",
+		["registry", "neighbour", "score", "position", "creation", "modified", "owner", "modified_by"],
+		[(*row, timestamp, timestamp, user, user) for row in rows],
+	)
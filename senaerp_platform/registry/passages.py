@@ -0,0 +1,217 @@
+"""Passage-level embeddings for long registry text.
+
+The item embedding only covers title, description, category and tags. Long
+bodies (``Registry.readme``, ``Registry Skill.skill_content``,
+``Registry Tool.instructions``) are split into overlapping word windows,
+embedded in batches and stored as int8 codes in ``Registry Passage``.
+``semantic_search`` scores passages too and keeps the best chunk score per
+item.
+
+Each passage row carries a hash of its source field and the embedding model,
+so refreshes only re-embed fields whose text (or the active model) changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+
+import frappe
+from frappe.utils import now, strip_html_tags
+
+from senaerp_platform.registry.embedding import _EMBEDDING_BATCH_SIZE, active_model, get_embeddings
+from senaerp_platform.registry.vector_index import META_FIELDS, VectorIndex, encode_int8
+
+# Source DocType -> long text fields to index
+PASSAGE_SOURCES = {
+	"Registry": ["readme"],
+	"Registry Skill": ["skill_content"],
+	"Registry Tool": ["instructions"],
+}
+
+CHUNK_WORDS = 200
+CHUNK_OVERLAP = 40
+MAX_CHUNKS_PER_FIELD = 50
+
+_VERSION_CACHE_KEY = "registry_passage_index_version"
+
+# site -> VectorIndex over passages (one entry per chunk, named by registry)
+_indexes: dict[str, VectorIndex] = {}
+
+
+def enqueue_passage_update(registry_name: str) -> None:
+	frappe.enqueue(
+		"senaerp_platform.registry.passages.update_passages",
+		queue="long",
+		job_id=f"registry_passages::{registry_name}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		registry_names=[registry_name],
+	)
+
+
+def refresh_all_passages() -> int:
+	"""Bring every item's passages up to date (e.g. after an embedding model switch)."""
+	names = frappe.get_all("Registry", pluck="name")
+	embedded = 0
+	for i in range(0, len(names), 500):
+		embedded += update_passages(names[i : i + 500])
+		frappe.db.commit()
+	return embedded
+
+
+def update_passages(registry_names) -> int:
+	"""Re-embed changed long-text fields of ``registry_names``. Returns the number of chunks embedded."""
+	model = active_model()
+	sources = _source_texts(registry_names)
+	stored = _stored_hashes(registry_names)
+
+	stale = []  # (registry, field, source_hash, chunks)
+	for key, text in sources.items():
+		source_hash = hashlib.sha256(text.encode()).hexdigest() if text else None
+		if stored.get(key) == (source_hash, model):
+			continue
+		stale.append((*key, source_hash, chunk_text(text) if text else []))
+	# Fields that no longer exist at all (deleted extension, emptied source)
+	stale.extend((*key, None, []) for key in stored if key not in sources)
+
+	if not stale:
+		return 0
+
+	vectors = _embed_chunks([chunk for *_, chunks in stale for chunk in chunks], model)
+	rows = []
+	replaced = []
+	offset = 0
+	for registry, field, source_hash, chunks in stale:
+		field_vectors = vectors[offset : offset + len(chunks)]
+		offset += len(chunks)
+		if any(v is None for v in field_vectors):
+			continue  # Embedding failed; keep the old passages and retry next time
+		replaced.append((registry, field))
+		rows.extend(
+			(registry, field, i, source_hash, model, encode_int8(v))
+			for i, v in enumerate(field_vectors)
+		)
+
+	_write_passages(replaced, rows)
+	return len(rows)
+
+
+def delete_passages(registry_name: str) -> None:
+	frappe.db.delete("Registry Passage", {"registry": registry_name})
+	invalidate_passage_index()
+
+
+def chunk_text(text: str) -> list[str]:
+	"""Overlapping windows of CHUNK_WORDS words."""
+	words = text.split()
+	step = CHUNK_WORDS - CHUNK_OVERLAP
+	chunks = []
+	for start in range(0, max(len(words) - CHUNK_OVERLAP, 1), step):
+		chunks.append(" ".join(words[start : start + CHUNK_WORDS]))
+		if len(chunks) == MAX_CHUNKS_PER_FIELD:
+			break
+	return chunks
+
+
+def passage_scores(query_vector, k: int, min_score=0.0, where=None) -> dict[str, float]:
+	"""Best chunk score per item among the top ``k`` passages."""
+	best: dict[str, float] = {}
+	for name, score in get_passage_index().nearest(query_vector, k, min_score=min_score, where=where):
+		if score > best.get(name, -1.0):
+			best[name] = score
+	return best
+
+
+def get_passage_index() -> VectorIndex:
+	site = frappe.local.site
+	version = frappe.cache.get_value(_VERSION_CACHE_KEY)
+	index = _indexes.get(site)
+	if index is None or index.version != version:
+		index = _indexes[site] = _load_index(version)
+	return index
+
+
+def invalidate_passage_index() -> None:
+	_indexes.pop(frappe.local.site, None)
+	frappe.db.after_commit.add(_bump_version)
+
+
+def _bump_version() -> None:
+	_indexes.pop(frappe.local.site, None)
+	frappe.cache.set_value(_VERSION_CACHE_KEY, frappe.generate_hash(length=12))
+
+
+def _load_index(version: str | None) -> VectorIndex:
+	meta = ", ".join(f"r.`{f}`" for f in META_FIELDS)
+	rows = frappe.db.sql(
+		f"""SELECT {meta}, p.`embedding_int8` AS _embedding_int8
+		FROM `tabRegistry Passage` p
+		JOIN `tabRegistry` r ON r.name = p.registry
+		WHERE p.`model` = %(model)s""",
+		{"model": active_model()},
+		as_dict=True,
+	)
+	return VectorIndex(version, rows, quantized=True)
+
+
+def _source_texts(registry_names) -> dict[tuple[str, str], str]:
+	"""{(registry, field): plain text} for every passage source of the given items."""
+	texts = {}
+	names = list(registry_names)
+	for doctype, fields in PASSAGE_SOURCES.items():
+		key_field = "name" if doctype == "Registry" else "registry"
+		for row in frappe.get_all(
+			doctype, filters={key_field: ("in", names)}, fields=[key_field, *fields]
+		):
+			for field in fields:
+				text = _plain_text(row.get(field))
+				if text:
+					texts[(row[key_field], field)] = text
+	return texts
+
+
+def _plain_text(value) -> str:
+	if not value:
+		return ""
+	return re.sub(r"\s+", " ", strip_html_tags(value)).strip()
+
+
+def _stored_hashes(registry_names) -> dict[tuple[str, str], tuple[str, str]]:
+	rows = frappe.db.sql(
+		"""SELECT DISTINCT `registry`, `source_field`, `source_hash`, `model`
+		FROM `tabRegistry Passage` WHERE `registry` IN %(names)s""",
+		{"names": tuple(registry_names)},
+	) if registry_names else []
+	return {(registry, field): (source_hash, model) for registry, field, source_hash, model in rows}
+
+
+def _embed_chunks(chunks: list[str], model: str) -> list:
+	"""Embed chunks in API batches; failed batches yield None entries."""
+	vectors = []
+	for i in range(0, len(chunks), _EMBEDDING_BATCH_SIZE):
+		batch = chunks[i : i + _EMBEDDING_BATCH_SIZE]
+		vectors.extend(get_embeddings(batch, model=model) or [None] * len(batch))
+	return vectors
+
+
+def _write_passages(replaced: list[tuple[str, str]], rows: list[tuple]) -> None:
+	if not replaced:
+		return
+	by_registry = defaultdict(list)
+	for registry, field in replaced:
+		by_registry[registry].append(field)
+	for registry, fields in by_registry.items():
+		frappe.db.delete("Registry Passage", {"registry": registry, "source_field": ("in", fields)})
+
+	if rows:
+		timestamp = now()
+		user = frappe.session.user
+		frappe.db.bulk_insert(
+			"Registry Passage",
+			["registry", "source_field", "chunk", "source_hash", "model", "embedding_int8",
+				"creation", "modified", "owner", "modified_by"],
+			[(*row, timestamp, timestamp, user, user) for row in rows],
+		)
+	invalidate_passage_index()
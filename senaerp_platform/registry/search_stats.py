@@ -0,0 +1,200 @@
+"""Buffered search analytics.
+
+``registry.api.search`` appends one small JSON event per query to a capped
+Redis list; nothing is written to the database on the request path. A
+scheduled job drains the list and folds the events into ``Registry Search
+Stat``: one row per day, normalized query and filter set, with counts,
+zero-result searches, slow searches and latency totals, upserted with one
+statement per batch. ``search_report`` summarizes top, zero-result and slow
+queries over recent days.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+
+import frappe
+import redis
+from frappe.utils import add_days, cint, nowdate
+
+_EVENTS_KEY = "registry_search_events"
+_MAX_BUFFERED_EVENTS = 100_000  # Older events are dropped if the drain job stalls
+_FLUSH_BATCH_SIZE = 1000
+_MAX_QUERY_LENGTH = 140
+
+SLOW_SEARCH_MS = 500
+RETENTION_DAYS = 90
+
+
+def normalize_query(q) -> str:
+	return re.sub(r"\s+", " ", (q or "").strip().lower())[:_MAX_QUERY_LENGTH]
+
+
+def record_search(q, filters: dict, path: str, latency_ms: float, hits: int) -> None:
+	"""Buffer one search event in Redis."""
+	event = json.dumps(
+		{
+			"q": normalize_query(q),
+			"f": {k: v for k, v in sorted(filters.items()) if v not in (None, "")},
+			"p": path,
+			"ms": round(latency_ms, 1),
+			"n": hits,
+			"d": nowdate(),
+		},
+		separators=(",", ":"),
+		default=str,
+	)
+	key = frappe.cache.make_key(_EVENTS_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.rpush(key, event)
+	pipe.ltrim(key, -_MAX_BUFFERED_EVENTS, -1)
+	try:
+		pipe.execute()
+	except redis.exceptions.RedisError:
+		pass  # Analytics are best effort; never fail the search
+
+
+def flush_search_events() -> int:
+	"""Aggregate buffered search events into Registry Search Stat. Returns the events processed."""
+	processed = 0
+	while True:
+		events = _drain_events(_FLUSH_BATCH_SIZE)
+		if not events:
+			break
+		try:
+			_apply_events(events)
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			_restore_events(events)
+			raise
+		processed += len(events)
+		if len(events) < _FLUSH_BATCH_SIZE:
+			break
+	return processed
+
+
+def prune_search_stats() -> None:
+	frappe.db.delete("Registry Search Stat", {"date": ("<", add_days(nowdate(), -RETENTION_DAYS))})
+
+
+@frappe.whitelist()
+def search_report(days=7, limit=20) -> dict:
+	"""Top, zero-result and slow queries over the last ``days`` days."""
+	frappe.only_for("System Manager")
+	values = {"since": add_days(nowdate(), -cint(days)), "limit": min(cint(limit) or 20, 500)}
+
+	def run(having, order_by):
+		return frappe.db.sql(
+			f"""
+			SELECT `query`, `filters`, SUM(`searches`) AS searches,
+				SUM(`zero_results`) AS zero_results, SUM(`slow_searches`) AS slow_searches,
+				SUM(`total_hits`) / SUM(`searches`) AS avg_hits,
+				SUM(`total_latency_ms`) / SUM(`searches`) AS avg_latency_ms,
+				MAX(`max_latency_ms`) AS max_latency_ms
+			FROM `tabRegistry Search Stat`
+			WHERE `date` >= %(since)s
+			GROUP BY `query`, `filters`
+			{having}
+			ORDER BY {order_by}
+			LIMIT %(limit)s
+			""",
+			values,
+			as_dict=True,
+		)
+
+	return {
+		"top": run("", "searches DESC"),
+		"zero_results": run("HAVING zero_results > 0", "zero_results DESC, searches DESC"),
+		"slow": run("HAVING slow_searches > 0", "avg_latency_ms DESC"),
+	}
+
+
+def top_searches(days: int, limit: int) -> list[dict]:
+	"""Most frequent (query, filters) pairs of the last ``days`` days, most searched first."""
+	return frappe.db.sql(
+		"""
+		SELECT `query`, `filters`, SUM(`searches`) AS searches
+		FROM `tabRegistry Search Stat`
+		WHERE `date` >= %(since)s
+		GROUP BY `query`, `filters`
+		ORDER BY searches DESC
+		LIMIT %(limit)s
+		""",
+		{"since": add_days(nowdate(), -days), "limit": limit},
+		as_dict=True,
+	)
+
+
+def _drain_events(count: int) -> list[str]:
+	"""Atomically pop up to ``count`` events from the head of the list."""
+	key = frappe.cache.make_key(_EVENTS_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.lrange(key, 0, count - 1)
+	pipe.ltrim(key, count, -1)
+	raw, _ = pipe.execute()
+	return [frappe.safe_decode(e) for e in raw or []]
+
+
+def _restore_events(events: list[str]) -> None:
+	pipe = frappe.cache.pipeline()
+	pipe.lpush(frappe.cache.make_key(_EVENTS_KEY), *reversed(events))
+	pipe.execute()
+
+
+def _apply_events(events: list[str]) -> None:
+	"""Fold a batch of events into one row per (day, query, filters), in one upsert."""
+	rows: dict[str, dict] = {}
+	for raw in events:
+		try:
+			event = json.loads(raw)
+		except ValueError:
+			continue
+		date = event["d"]
+		filters = json.dumps(event["f"], sort_keys=True, separators=(",", ":"))
+		name = hashlib.sha256(f"{date}\n{event['q']}\n{filters}".encode()).hexdigest()[:20]
+		row = rows.setdefault(name, {
+			"date": date, "query": event["q"], "filters": filters, "path": event["p"],
+			"searches": 0, "zero": 0, "slow": 0, "hits": 0, "latency": 0.0, "max_latency": 0.0,
+		})
+		row["path"] = event["p"]
+		row["searches"] += 1
+		row["zero"] += not event["n"]
+		row["slow"] += event["ms"] >= SLOW_SEARCH_MS
+		row["hits"] += event["n"]
+		row["latency"] += event["ms"]
+		row["max_latency"] = max(row["max_latency"], event["ms"])
+	if not rows:
+		return
+
+	values = {"now": frappe.utils.now(), "user": frappe.session.user}
+	placeholders = []
+	for i, (name, row) in enumerate(rows.items()):
+		values.update({f"{key}{i}": value for key, value in row.items()})
+		values[f"name{i}"] = name
+		placeholders.append(
+			f"(%(name{i})s, %(date{i})s, %(query{i})s, %(filters{i})s, %(path{i})s, %(searches{i})s,"
+			f" %(zero{i})s, %(slow{i})s, %(hits{i})s, %(latency{i})s, %(max_latency{i})s,"
+			" %(now)s, %(now)s, %(user)s, %(user)s)"
+		)
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tabRegistry Search Stat`
+			(`name`, `date`, `query`, `filters`, `last_path`, `searches`, `zero_results`,
+			`slow_searches`, `total_hits`, `total_latency_ms`, `max_latency_ms`,
+			`creation`, `modified`, `owner`, `modified_by`)
+		VALUES {", ".join(placeholders)}
+		ON DUPLICATE KEY UPDATE
+			`last_path` = VALUES(`last_path`),
+			`searches` = `searches` + VALUES(`searches`),
+			`zero_results` = `zero_results` + VALUES(`zero_results`),
+			`slow_searches` = `slow_searches` + VALUES(`slow_searches`),
+			`total_hits` = `total_hits` + VALUES(`total_hits`),
+			`total_latency_ms` = `total_latency_ms` + VALUES(`total_latency_ms`),
+			`max_latency_ms` = GREATEST(`max_latency_ms`, VALUES(`max_latency_ms`)),
+			`modified` = VALUES(`modified`)
+		""",
+		values,
+	)
@@ -1,12 +1,17 @@
 """Registry seed data.
 
 Seeds pre-defined Agent Templates and Team Templates on every bench migrate.
-Uses the new direct property/trigger/overridable Check fields.
+Uses the new direct property/trigger/overridable Check fields. Migrates with
+unchanged seed definitions are a no-op.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
+
 import frappe
+from frappe.utils import cint
 
 PROPERTY_FIELDS = [
 	"injectable",
@@ -152,13 +157,59 @@ TEMPLATES = [
 ]
 
 
+TEAM_TEMPLATES = [
+	{
+		"title": "Default",
+		"description": "Permissive team template. All capabilities allowed for all roles. Overridable at agent level.",
+		"overridable": 1,
+	},
+	{
+		"title": "Standard",
+		"description": "Balanced team template with role-appropriate permissions. Not overridable.",
+		"overridable": 0,
+	},
+]
+
+# frappe.db global holding the hash of the last applied seed definitions
+_SEED_HASH_KEY = "registry_seed_hash"
+
+
 def seed_registry() -> None:
-	"""Seed the registry with pre-defined templates and team templates. Idempotent."""
+	"""Seed the registry with pre-defined templates and team templates. Idempotent.
+
+	Skips all writes when the seed definitions are unchanged since the last
+	run and every seeded item still exists; otherwise only fields that differ
+	are written.
+	"""
+	seed_hash = _seed_hash()
+	if frappe.db.get_global(_SEED_HASH_KEY) == seed_hash and _seeded_items_exist():
+		return
+
 	template_map = _seed_templates()
 	_seed_team_templates(template_map)
+	frappe.db.set_global(_SEED_HASH_KEY, seed_hash)
 	frappe.db.commit()
 
 
+def _seed_hash() -> str:
+	payload = json.dumps({"templates": TEMPLATES, "team_templates": TEAM_TEMPLATES}, sort_keys=True)
+	return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _seeded_items_exist() -> bool:
+	expected = {("Agent Template", t["title"]) for t in TEMPLATES}
+	expected |= {("Team Template", t["title"]) for t in TEAM_TEMPLATES}
+	existing = {
+		(r.item_type, r.title)
+		for r in frappe.get_all(
+			"Registry",
+			filters={"item_type": ("in", ["Agent Template", "Team Template"]), "ref_name": ("is", "set")},
+			fields=["item_type", "title"],
+		)
+	}
+	return expected <= existing
+
+
 def _seed_templates() -> dict[str, str]:
 	"""Create or update the 4 pre-seeded agent templates. Returns {title: extension_name}."""
 	template_map: dict[str, str] = {}
@@ -171,10 +222,15 @@ def _seed_templates() -> dict[str, str]:
 		)
 
 		if ref_name:
-			ext = frappe.get_doc("Registry Agent Template", ref_name)
-			for field in ALL_TEMPLATE_FIELDS:
-				setattr(ext, field, tmpl_def[field])
-			ext.save(ignore_permissions=True)
+			current = frappe.db.get_value(
+				"Registry Agent Template", ref_name, ALL_TEMPLATE_FIELDS, as_dict=True
+			) or {}
+			changed = [f for f in ALL_TEMPLATE_FIELDS if cint(current.get(f)) != tmpl_def[f]]
+			if changed:
+				ext = frappe.get_doc("Registry Agent Template", ref_name)
+				for field in changed:
+					setattr(ext, field, tmpl_def[field])
+				ext.save(ignore_permissions=True)
 			template_map[title] = ref_name
 			continue
 
@@ -198,18 +254,13 @@ def _seed_templates() -> dict[str, str]:
 
 def _seed_team_templates(template_map: dict[str, str]) -> None:
 	"""Create the 2 pre-seeded team templates with role configs."""
-	_seed_team_template(
-		title="Default",
-		description="Permissive team template. All capabilities allowed for all roles. Overridable at agent level.",
-		overridable=1,
-		template_map=template_map,
-	)
-	_seed_team_template(
-		title="Standard",
-		description="Balanced team template with role-appropriate permissions. Not overridable.",
-		overridable=0,
-		template_map=template_map,
-	)
+	for team_def in TEAM_TEMPLATES:
+		_seed_team_template(
+			title=team_def["title"],
+			description=team_def["description"],
+			overridable=team_def["overridable"],
+			template_map=template_map,
+		)
 
 
 def _seed_team_template(
@@ -218,21 +269,36 @@ def _seed_team_template(
 	overridable: int,
 	template_map: dict[str, str],
 ) -> None:
+	role_configs = [
+		{"role": role_ext_name, "min_agents": 1, "max_agents": 1}
+		for role_ext_name in template_map.values()
+	]
+
 	existing = frappe.db.get_value(
 		"Registry",
 		{"title": title, "item_type": "Team Template"},
 		"ref_name",
 	)
 	if existing:
+		current_overridable = cint(frappe.db.get_value("Registry Team Template", existing, "overridable"))
+		current_configs = [
+			{"role": r.role, "min_agents": cint(r.min_agents), "max_agents": cint(r.max_agents)}
+			for r in frappe.get_all(
+				"Registry Team Template Role Config",
+				filters={"parent": existing, "parenttype": "Registry Team Template"},
+				fields=["role", "min_agents", "max_agents"],
+				order_by="idx asc",
+			)
+		]
+		if current_overridable == overridable and current_configs == role_configs:
+			return
+
 		ext = frappe.get_doc("Registry Team Template", existing)
 		ext.overridable = overridable
-		ext.set("role_configs", [])
-		for role_title, role_ext_name in template_map.items():
-			ext.append("role_configs", {
-				"role": role_ext_name,
-				"min_agents": 1,
-				"max_agents": 1,
-			})
+		if current_configs != role_configs:
+			ext.set("role_configs", [])
+			for config in role_configs:
+				ext.append("role_configs", config)
 		ext.save(ignore_permissions=True)
 		return
 
@@ -246,10 +312,6 @@ def _seed_team_template(
 
 	ext = frappe.get_doc("Registry Team Template", reg.ref_name)
 	ext.overridable = overridable
-	for role_title, role_ext_name in template_map.items():
-		ext.append("role_configs", {
-			"role": role_ext_name,
-			"min_agents": 1,
-			"max_agents": 1,
-		})
+	for config in role_configs:
+		ext.append("role_configs", config)
 	ext.save(ignore_permissions=True)
@@ -0,0 +1,142 @@
+"""Registry snapshot export and restore.
+
+A snapshot is a single gzip-compressed JSON file holding every row of
+Registry, the extension DocTypes and their child tables (names, ref_name
+links and embeddings included), plus the naming series counters::
+
+	bench --site <site> execute senaerp_platform.registry.snapshot.export_snapshot
+	bench --site <site> execute senaerp_platform.registry.snapshot.restore_snapshot --args "['/path/to/file.json.gz']"
+
+Restore replaces the registry tables inside one transaction using multi-row
+INSERTs, so staging refreshes and test fixtures load in seconds.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+
+import frappe
+from frappe.utils import now_datetime
+
+from senaerp_platform.registry.api import _CHILD_TABLE_DOCTYPES, _PACKAGE_CACHE_KEY, EXTENSION_MAP
+from senaerp_platform.registry.changes import queue_changes, queue_delete
+from senaerp_platform.registry.vector_index import invalidate_index
+
+SNAPSHOT_FORMAT = "senaerp-registry-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Child tables first so deletes never leave orphans behind a parent
+CHILD_DOCTYPES = ["Registry Tag", *_CHILD_TABLE_DOCTYPES.values()]
+EXTENSION_DOCTYPES = list(EXTENSION_MAP.values())
+SNAPSHOT_DOCTYPES = [
+	*CHILD_DOCTYPES, "Registry Neighbour", "Registry Passage", *EXTENSION_DOCTYPES, "Registry",
+]
+
+_INSERT_CHUNK = 1000
+
+
+def export_snapshot(path: str | None = None) -> str:
+	"""Write all registry tables to a compressed snapshot file. Returns its path."""
+	if not path:
+		stamp = now_datetime().strftime("%Y%m%d-%H%M%S")
+		path = frappe.get_site_path("private", "backups", f"registry-snapshot-{stamp}.json.gz")
+
+	tables = {}
+	for doctype in SNAPSHOT_DOCTYPES:
+		columns = frappe.db.get_table_columns(doctype)
+		column_sql = ", ".join(f"`{c}`" for c in columns)
+		tables[doctype] = {
+			"columns": columns,
+			"rows": frappe.db.sql(f"SELECT {column_sql} FROM `tab{doctype}` ORDER BY `name`"),
+		}
+
+	snapshot = {
+		"format": SNAPSHOT_FORMAT,
+		"version": SNAPSHOT_VERSION,
+		"created": str(now_datetime()),
+		"series": dict(frappe.db.sql(
+			"SELECT `name`, `current` FROM `tabSeries` WHERE `name` IN %(prefixes)s",
+			{"prefixes": tuple(_series_prefixes())},
+		)),
+		"tables": tables,
+	}
+
+	with gzip.open(path, "wt", encoding="utf-8") as f:
+		json.dump(snapshot, f, default=str, separators=(",", ":"))
+
+	print(f"Registry snapshot written to {path}")
+	return path
+
+
+def restore_snapshot(path: str) -> dict:
+	"""Replace all registry tables with the contents of a snapshot file.
+
+	Everything happens in one transaction; on any error the registry is left
+	untouched.
+	"""
+	with gzip.open(path, "rt", encoding="utf-8") as f:
+		snapshot = json.load(f)
+
+	if snapshot.get("format") != SNAPSHOT_FORMAT:
+		frappe.throw(f"{path} is not a registry snapshot")
+	if snapshot.get("version") != SNAPSHOT_VERSION:
+		frappe.throw(f"Unsupported registry snapshot version: {snapshot.get('version')}")
+
+	counts = {}
+	try:
+		clear_registry_tables()
+		for doctype in SNAPSHOT_DOCTYPES:
+			table = snapshot["tables"].get(doctype)
+			if not table:
+				continue
+			counts[doctype] = _insert_rows(doctype, table["columns"], table["rows"])
+		queue_changes(frappe.get_all("Registry", pluck="name"))
+
+		for prefix, current in snapshot.get("series", {}).items():
+			frappe.db.sql(
+				"""INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)
+				ON DUPLICATE KEY UPDATE `current` = GREATEST(`current`, VALUES(`current`))""",
+				(prefix, current),
+			)
+		invalidate_index()
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		raise
+
+	frappe.cache.delete_key(_PACKAGE_CACHE_KEY)
+
+	print(f"Registry snapshot restored: {sum(counts.values())} rows")
+	return counts
+
+
+def clear_registry_tables() -> None:
+	"""Delete all rows from Registry, extension and child tables (no commit).
+
+	Every removed item is queued as a delete in the change feed.
+	"""
+	for r in frappe.get_all("Registry", fields=["name", "slug", "item_type"]):
+		queue_delete(r.name, r.slug, r.item_type)
+	for doctype in SNAPSHOT_DOCTYPES:
+		frappe.db.sql(f"DELETE FROM `tab{doctype}`")
+
+
+def _insert_rows(doctype: str, columns: list[str], rows: list[list]) -> int:
+	"""Multi-row insert, ignoring snapshot columns the current schema no longer has."""
+	current = set(frappe.db.get_table_columns(doctype))
+	keep = [i for i, c in enumerate(columns) if c in current]
+	fields = [columns[i] for i in keep]
+	values = [[row[i] for i in keep] for row in rows]
+	if values:
+		frappe.db.bulk_insert(doctype, fields, values, chunk_size=_INSERT_CHUNK)
+	return len(values)
+
+
+def _series_prefixes() -> list[str]:
+	prefixes = []
+	for doctype in ["Registry", *EXTENSION_DOCTYPES]:
+		autoname = frappe.get_meta(doctype).autoname or ""
+		if "." in autoname:
+			prefixes.append(autoname.split(".", 1)[0])
+	return prefixes
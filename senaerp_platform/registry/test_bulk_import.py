@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from senaerp_platform.registry.api import _EXT_LINK_FIELDS, INSTALL_ORDER
+from senaerp_platform.registry.bulk_import import import_rows
+from senaerp_platform.registry.cycles import reachable_types
+
+_PREFIX = "test-bulk-"
+
+
+def _row(item_type, slug, extension=None):
+	return {
+		"item_type": item_type,
+		"title": slug.replace("-", " ").title(),
+		"slug": f"{_PREFIX}{slug}",
+		"extension": extension or {},
+	}
+
+
+def _ref_name(slug):
+	return frappe.db.get_value("Registry", {"slug": f"{_PREFIX}{slug}"}, "ref_name")
+
+
+class TestBulkImport(FrappeTestCase):
+	def setUp(self):
+		enqueue = patch("frappe.enqueue")
+		enqueue.start()
+		self.addCleanup(enqueue.stop)
+
+	def tearDown(self):
+		items = frappe.get_all(
+			"Registry", filters={"slug": ("like", f"{_PREFIX}%")}, fields=["name", "item_type"]
+		)
+		# Dependents first, so extension link checks pass
+		items.sort(key=lambda r: INSTALL_ORDER.get(r.item_type, 99), reverse=True)
+		for item in items:
+			frappe.delete_doc("Registry", item.name, force=True, ignore_permissions=True)
+		frappe.db.commit()
+
+	def test_failed_row_does_not_corrupt_batch_links(self):
+		result = import_rows([
+			_row("Tool", "tool-a"),
+			_row("Tool", "tool-b"),
+			_row(
+				"Agent",
+				"agent",
+				{"agent_tools": [{"tool": f"{_PREFIX}tool-a"}, {"tool": f"{_PREFIX}tool-b"}]},
+			),
+			_row("Agent", "broken", {"agent_tools": [{"tool": f"{_PREFIX}missing"}]}),
+		])
+
+		self.assertEqual(result["inserted"], 3)
+		self.assertEqual([e["slug"] for e in result["errors"]], [f"{_PREFIX}broken"])
+		self.assertIn(f"{_PREFIX}missing", result["errors"][0]["error"])
+
+		tools = frappe.get_all(
+			"Registry Agent Tool", filters={"parent": _ref_name("agent")}, pluck="tool", order_by="idx asc"
+		)
+		self.assertEqual(tools, [_ref_name("tool-a"), _ref_name("tool-b")])
+		for tool, slug in zip(tools, ("tool-a", "tool-b")):
+			registry = frappe.db.get_value("Registry Tool", tool, "registry")
+			self.assertEqual(frappe.db.get_value("Registry", registry, "slug"), f"{_PREFIX}{slug}")
+
+	def test_link_of_wrong_type_is_reported(self):
+		result = import_rows([
+			_row("Skill", "skill"),
+			_row("Agent", "agent", {"agent_tools": [{"tool": f"{_PREFIX}skill"}]}),
+		])
+
+		self.assertEqual(result["inserted"], 1)
+		self.assertEqual([e["slug"] for e in result["errors"]], [f"{_PREFIX}agent"])
+
+	def test_link_closing_a_cycle_is_reported(self):
+		# No link fields form a loop today, so let tools point back at agents
+		with patch.dict(_EXT_LINK_FIELDS, {"Registry Tool": {"handler_path": "Registry Agent"}}):
+			reachable_types.cache_clear()
+			self.addCleanup(reachable_types.cache_clear)
+
+			result = import_rows([
+				_row("Tool", "tool-a"),
+				_row("Agent", "agent", {"agent_tools": [{"tool": f"{_PREFIX}tool-a"}]}),
+			])
+			self.assertEqual(result["errors"], [])
+
+			result = import_rows([_row("Tool", "tool-a", {"handler_path": f"{_PREFIX}agent"})])
+
+		self.assertEqual(result["updated"], 0)
+		self.assertEqual([e["slug"] for e in result["errors"]], [f"{_PREFIX}tool-a"])
+		self.assertIn("depend on itself", result["errors"][0]["error"])
+		self.assertFalse(frappe.db.get_value("Registry Tool", _ref_name("tool-a"), "handler_path"))
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from senaerp_platform.registry.changes import _flush_pending
+
+
+class TestChangeFeed(FrappeTestCase):
+	def setUp(self):
+		enqueue = patch("frappe.enqueue")
+		enqueue.start()
+		self.addCleanup(enqueue.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _feed(self, prefix):
+		return [
+			(r.slug, r.op)
+			for r in frappe.get_all(
+				"Registry Change",
+				filters={"slug": ("like", f"{prefix}%"), "published": 1},
+				fields=["slug", "op"],
+				order_by="name asc",
+			)
+		]
+
+	def test_rename_deletes_old_slug(self):
+		doc = frappe.get_doc({
+			"doctype": "Registry",
+			"item_type": "Tool",
+			"title": "Test Feed Tool",
+			"slug": "test-feed-tool",
+			"trust_status": "approved",
+			"visibility": "public",
+		}).insert(ignore_permissions=True)
+		_flush_pending()
+
+		doc.slug = "test-feed-tool-renamed"
+		doc.save(ignore_permissions=True)
+		_flush_pending()
+
+		self.assertEqual(
+			self._feed("test-feed-tool"),
+			[
+				("test-feed-tool", "insert"),
+				("test-feed-tool", "delete"),
+				("test-feed-tool-renamed", "insert"),
+			],
+		)
+
+	def test_private_item_is_not_published(self):
+		frappe.get_doc({
+			"doctype": "Registry",
+			"item_type": "Tool",
+			"title": "Test Feed Private",
+			"slug": "test-feed-private",
+			"trust_status": "approved",
+			"visibility": "private",
+		}).insert(ignore_permissions=True)
+		_flush_pending()
+
+		self.assertEqual(self._feed("test-feed-private"), [])
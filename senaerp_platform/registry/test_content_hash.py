@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from senaerp_platform.registry.api import get_install_delta
+
+
+def _item(item_type, slug):
+	return frappe.get_doc({
+		"doctype": "Registry",
+		"item_type": item_type,
+		"title": slug.replace("-", " ").title(),
+		"slug": slug,
+		"trust_status": "approved",
+	}).insert(ignore_permissions=True)
+
+
+class TestContentHash(FrappeTestCase):
+	def setUp(self):
+		enqueue = patch("frappe.enqueue")
+		enqueue.start()
+		self.addCleanup(enqueue.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_renaming_a_dependency_updates_parent_hash(self):
+		tool = _item("Tool", "test-hash-tool")
+		agent = _item("Agent", "test-hash-agent")
+		agent_ext = frappe.get_doc("Registry Agent", agent.ref_name)
+		agent_ext.append("agent_tools", {"tool": tool.ref_name})
+		agent_ext.save(ignore_permissions=True)
+
+		installed = {item["slug"]: item["content_hash"] for item in get_install_delta(agent.slug)["items"]}
+		self.assertEqual(set(installed), {"test-hash-tool", "test-hash-agent"})
+
+		tool.reload()
+		tool.slug = "test-hash-tool-renamed"
+		tool.save(ignore_permissions=True)
+
+		delta = get_install_delta(agent.slug, installed)
+		items = {item["slug"]: item for item in delta["items"]}
+		self.assertEqual(set(items), {"test-hash-tool-renamed", "test-hash-agent"})
+		self.assertEqual(delta["orphaned"], ["test-hash-tool"])
+		self.assertEqual(
+			[row["tool"] for row in items["test-hash-agent"]["extension"]["agent_tools"]],
+			["test-hash-tool-renamed"],
+		)
+		self.assertEqual(
+			items["test-hash-agent"]["content_hash"],
+			frappe.db.get_value("Registry", agent.name, "content_hash"),
+		)
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from senaerp_platform.registry.embedding import _embedding_values, active_model, semantic_search
+from senaerp_platform.registry.vector_index import get_index, invalidate_index
+
+_VECTOR = [1.0, 0.5, 0.25, 0.0]
+
+
+class TestSemanticSearch(FrappeTestCase):
+	def setUp(self):
+		for target, value in (
+			("frappe.enqueue", None),
+			("senaerp_platform.registry.embedding.get_query_embedding", _VECTOR),
+		):
+			patcher = patch(target, return_value=value)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+		invalidate_index()
+
+	def test_item_approved_in_desk_is_found(self):
+		doc = frappe.get_doc({
+			"doctype": "Registry",
+			"item_type": "Tool",
+			"title": "Test Semantic Approval",
+			"slug": "test-semantic-approval",
+		}).insert(ignore_permissions=True)
+		frappe.db.set_value("Registry", doc.name, _embedding_values(_VECTOR, active_model()))
+		invalidate_index()
+
+		# Warm the index while the item is still unreviewed
+		index = get_index()
+		self.assertEqual(index.meta[index.position[doc.name]]["trust_status"], "unreviewed")
+
+		doc.reload()
+		doc.trust_status = "approved"
+		doc.save(ignore_permissions=True)
+
+		results = semantic_search("approval", filters={"trust_status": "approved"}) or []
+		self.assertIn(doc.name, [r.name for r in results])
@@ -0,0 +1,238 @@
+"""In-process vector index over registry embeddings.
+
+Embeddings are stored as JSON on ``Registry._embedding``. Parsing them for
+every request is what made semantic lookups expensive, so each worker keeps
+one decoded, L2-normalized copy per site and reloads it only when the index
+version (bumped in Redis after embeddings are committed) changes. With
+normalized vectors, cosine similarity is a plain dot product.
+
+With ``"registry_vector_quantization": "int8"`` in site config, query-time
+indexes hold symmetric int8 codes (one float scale per vector) loaded from the
+compact ``_embedding_int8`` column instead: a quarter of the memory and a
+fraction of the load bandwidth. Scores from the int8 scan are approximate, so
+callers re-rank the top candidates with the exact float vectors
+(see ``rerank``). Without ``math.sumprod`` (Python < 3.12) the int8 scan is
+slower than the float one; ``registry.benchmark`` measures the trade-off.
+"""
+
+from __future__ import annotations
+
+import base64
+import heapq
+import json
+import math
+import operator
+import struct
+from array import array
+from collections import Counter
+
+import frappe
+
+_VERSION_CACHE_KEY = "registry_vector_index_version"
+
+# Dot product: C-level math.sumprod on Python 3.12+, map/sum otherwise
+dot = getattr(math, "sumprod", None) or (lambda a, b: sum(map(operator.mul, a, b)))
+
+# (site, quantized) -> VectorIndex
+_indexes: dict[tuple[str, bool], VectorIndex] = {}
+
+META_FIELDS = ["name", "slug", "item_type", "category", "trust_status", "featured"]
+
+
+class VectorIndex:
+	def __init__(self, version: str | None, rows: list[dict], quantized: bool = False):
+		self.version = version
+		self.quantized = quantized
+		self.names: list[str] = []
+		self.meta: list[dict] = []
+		self.vectors: list[array] = []
+		self.scales: list[float] = []
+
+		column = "_embedding_int8" if quantized else "_embedding"
+		for row in rows:
+			value = row.pop(column)
+			if quantized:
+				decoded = decode_int8(value)
+				if decoded is None:
+					continue
+				vector, scale = decoded
+				self.scales.append(scale)
+			else:
+				vector = parse_vector(value)
+				if vector is None:
+					continue
+			self.names.append(row["name"])
+			self.meta.append(row)
+			self.vectors.append(vector)
+		self._drop_odd_dimensions()
+		self.position = {name: i for i, name in enumerate(self.names)}
+
+	def _drop_odd_dimensions(self) -> None:
+		"""Keep only vectors of the most common length; others are truncated or from another model."""
+		lengths = Counter(len(v) for v in self.vectors)
+		if len(lengths) < 2:
+			return
+		dims = lengths.most_common(1)[0][0]
+		keep = [i for i, v in enumerate(self.vectors) if len(v) == dims]
+		self.names = [self.names[i] for i in keep]
+		self.meta = [self.meta[i] for i in keep]
+		self.vectors = [self.vectors[i] for i in keep]
+		if self.quantized:
+			self.scales = [self.scales[i] for i in keep]
+
+	def __len__(self):
+		return len(self.names)
+
+	def vector(self, name: str) -> array | None:
+		i = self.position.get(name)
+		return self.vectors[i] if i is not None else None
+
+	def scores(self, vector) -> list[float]:
+		"""Cosine similarity of ``vector`` (normalized float) against every indexed item."""
+		if not self.quantized:
+			return [dot(vector, v) for v in self.vectors]
+		codes, scale = quantize(vector)
+		return [dot(codes, v) * scale * s for v, s in zip(self.vectors, self.scales)]
+
+	def nearest(self, vector, k: int, min_score=0.0, where=None, exclude=()) -> list[tuple[str, float]]:
+		"""Top ``k`` (name, score) pairs, best first.
+
+		``where`` is an optional predicate over an item's meta dict
+		(see ``META_FIELDS``).
+		"""
+		hits = (
+			(self.names[i], score)
+			for i, score in enumerate(self.scores(vector))
+			if score >= min_score
+			and self.names[i] not in exclude
+			and (where is None or where(self.meta[i]))
+		)
+		return heapq.nlargest(k, hits, key=operator.itemgetter(1))
+
+	def memory_bytes(self) -> int:
+		"""Approximate size of the vector payload (excluding per-item metadata)."""
+		return sum(v.itemsize * len(v) for v in self.vectors) + 8 * len(self.scales)
+
+
+def parse_vector(value) -> array | None:
+	"""Decode a stored embedding into a normalized float array."""
+	if not value:
+		return None
+	try:
+		values = json.loads(value) if isinstance(value, str) else value
+	except (json.JSONDecodeError, TypeError):
+		return None
+	return normalize(values)
+
+
+def normalize(values) -> array | None:
+	norm = math.sqrt(sum(x * x for x in values))
+	if not norm:
+		return None
+	return array("f", (x / norm for x in values))
+
+
+def quantize(vector) -> tuple[array, float]:
+	"""Symmetric int8 quantization: ``vector ~= codes * scale``."""
+	peak = max((abs(x) for x in vector), default=0.0)
+	if not peak:
+		return array("b", bytes(len(vector))), 0.0
+	scale = peak / 127
+	return array("b", (round(x / scale) for x in vector)), scale
+
+
+def encode_int8(values) -> str | None:
+	"""Normalize and quantize an embedding for the ``_embedding_int8`` column."""
+	vector = normalize(values)
+	if vector is None:
+		return None
+	codes, scale = quantize(vector)
+	return base64.b64encode(struct.pack("<f", scale) + codes.tobytes()).decode()
+
+
+def decode_int8(value) -> tuple[array, float] | None:
+	if not value:
+		return None
+	try:
+		raw = base64.b64decode(value)
+		(scale,) = struct.unpack("<f", raw[:4])
+	except (ValueError, TypeError, struct.error):
+		return None
+	if len(raw) < 5 or not math.isfinite(scale):
+		return None
+	return array("b", raw[4:]), scale
+
+
+def quantization_enabled() -> bool:
+	return frappe.conf.get("registry_vector_quantization") == "int8"
+
+
+def rerank(vector, candidates: list[tuple[str, float]], min_score=0.0) -> list[tuple[str, float]]:
+	"""Replace approximate scores with exact float cosine similarity, best first."""
+	if not candidates:
+		return []
+	stored = dict(frappe.get_all(
+		"Registry",
+		filters={"name": ("in", [name for name, _ in candidates])},
+		fields=["name", "_embedding"],
+		as_list=True,
+	))
+	exact = []
+	for name, _ in candidates:
+		v = parse_vector(stored.get(name))
+		if v is None or len(v) != len(vector):
+			continue
+		score = dot(vector, v)
+		if score >= min_score:
+			exact.append((name, score))
+	exact.sort(key=operator.itemgetter(1), reverse=True)
+	return exact
+
+
+def get_index(quantized: bool | None = None) -> VectorIndex:
+	"""Return this worker's index for the current site, reloading it if stale.
+
+	``quantized`` defaults to the site setting; background jobs that need
+	exact scores (neighbour lists) ask for the float index explicitly.
+	"""
+	if quantized is None:
+		quantized = quantization_enabled()
+	key = (frappe.local.site, quantized)
+	version = get_index_version()
+	index = _indexes.get(key)
+	if index is None or index.version != version:
+		index = _indexes[key] = _load_index(version, quantized)
+	return index
+
+
+def get_index_version() -> str | None:
+	"""Token that changes whenever stored embeddings change."""
+	return frappe.cache.get_value(_VERSION_CACHE_KEY)
+
+
+def invalidate_index() -> None:
+	"""Drop the local index now, and other workers' copies once the transaction commits."""
+	_drop_local()
+	frappe.db.after_commit.add(_bump_version)
+
+
+def _drop_local() -> None:
+	for key in [k for k in _indexes if k[0] == frappe.local.site]:
+		del _indexes[key]
+
+
+def _bump_version() -> None:
+	_drop_local()
+	frappe.cache.set_value(_VERSION_CACHE_KEY, frappe.generate_hash(length=12))
+
+
+def _load_index(version: str | None, quantized: bool) -> VectorIndex:
+	column = "_embedding_int8" if quantized else "_embedding"
+	rows = frappe.get_all(
+		"Registry",
+		filters={column: ("is", "set")},
+		fields=[*META_FIELDS, column],
+		order_by="name asc",
+		limit_page_length=0,
+	)
+	return VectorIndex(version, rows, quantized=quantized)
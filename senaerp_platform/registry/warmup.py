@@ -0,0 +1,77 @@
+"""Warm search caches after a deploy.
+
+After ``bench migrate`` every cache starts cold and the first visitors pay
+for embedding their queries and running the scans. ``warm_search_caches``
+runs in a background job after migrate and replays the most frequent recent
+searches and browse parameter sets (from ``Registry Search Stat``) through
+``registry.api.search``, filling the shared Redis caches for query
+embeddings and search results.
+
+Replays stop once the time budget is spent, and are not counted in search
+analytics. Only the shared Redis caches are warmed: the job runs in a
+short-lived work-horse process, so the in-process vector, passage and tag
+indexes it builds die with it. Each web worker still loads its own on its
+first search.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+
+import frappe
+from frappe.utils import cint
+
+WARMUP_QUERIES = 100  # site config: registry_warmup_queries
+WARMUP_SECONDS = 60  # site config: registry_warmup_seconds
+_WARMUP_DAYS = 7
+
+
+def enqueue_warmup() -> None:
+	frappe.enqueue(
+		"senaerp_platform.registry.warmup.warm_search_caches",
+		queue="long",
+		job_id="registry_search_warmup",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def warm_search_caches() -> dict:
+	from senaerp_platform.registry.api import search
+	from senaerp_platform.registry.search_stats import top_searches
+
+	deadline = time.monotonic() + (cint(frappe.conf.get("registry_warmup_seconds")) or WARMUP_SECONDS)
+
+	replayed = 0
+	frappe.flags.registry_search_warmup = True
+	try:
+		limit = cint(frappe.conf.get("registry_warmup_queries")) or WARMUP_QUERIES
+		for row in top_searches(_WARMUP_DAYS, limit):
+			if time.monotonic() >= deadline:
+				break
+			try:
+				search(**_search_kwargs(row.query, json.loads(row.filters or "{}")))
+			except Exception:
+				# A single bad parameter set must not stop the warmup
+				frappe.log_error(title="Registry search warmup failed")
+				continue
+			replayed += 1
+	finally:
+		frappe.flags.registry_search_warmup = False
+
+	return {"replayed": replayed}
+
+
+def _search_kwargs(query: str, filters: dict) -> dict:
+	"""Map a recorded filter set back to ``search`` arguments."""
+	return {
+		"q": query or None,
+		"item_type": filters.get("item_type"),
+		"category": filters.get("category"),
+		"tags": filters.get("tags"),
+		"trust_status": filters.get("trust_status"),
+		"featured_only": bool(filters.get("featured")),
+		"sort_by": filters.get("sort_by") or "featured",
+		"limit": filters.get("limit") or 20,
+	}
@@ -15,7 +15,10 @@ def after_request(response):
 	"""
 	# Add cache headers for static files (videos, images, etc.)
 	request_path = frappe.request.path if hasattr(frappe, 'request') else ''
-	if request_path and request_path.startswith('/files/'):
+	if request_path and request_path.startswith('/files/registry-catalog/catalog-'):
+		# Catalog snapshots are content-hashed, so they never change
+		response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+	elif request_path and request_path.startswith('/files/'):
 		# Get file extension
 		ext = request_path.lower().split('.')[-1] if '.' in request_path else ''
 